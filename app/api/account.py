@@ -1,28 +1,48 @@
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Query, Path, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Path, Depends, Response
+from typing import AsyncIterator, List, Optional
 import httpx
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 
 from app.dependencies import token_check
 from app.models.schemas import AccountDTO, TransactionDTO, TransferByAccountNumberReq, \
-    TransferByPhoneNumberReq, TransferByAccountReq
+    TransferByPhoneNumberReq, TransferByAccountReq, TransferAcceptedDTO, TransferStatusDTO
 from app.services.account_service import (
     get_client_accounts,
+    get_client_accounts_raw,
     create_debit_account,
     withdraw_account,
     get_transactions,
+    stream_transactions,
     deposit_account,
-    delete_account, set_primary_account, transfer_funds_by_account_number, transfer_funds_by_client,
-    transfer_funds_by_account,
+    delete_account, set_primary_account, transfer_funds_by_account_number, transfer_funds_by_phone,
+    transfer_funds_by_account, get_transfer_status,
 )
-from app.services.client_service import get_account_id_by_phone
+from app.utils.passthrough import passthrough_enabled, passthrough_response
+from app.utils.metrics import TimedRoute
 
 router = APIRouter(
     prefix="/accounts",
-    tags=["Account"]
+    tags=["Account"],
+    route_class=TimedRoute
 )
 
+ACCOUNT_LIST = TypeAdapter(List[AccountDTO])
+
+
+async def _ndjson(items: AsyncIterator[TransactionDTO]) -> AsyncIterator[bytes]:
+    async for item in items:
+        yield item.model_dump_json().encode() + b"\n"
+
+
+def _transfer_response(result: str, async_mode: bool, response: Response):
+    if async_mode:
+        response.status_code = 202
+        return TransferAcceptedDTO(transfer_id=UUID(result), status="processing")
+    return {"message": result}
+
 
 @router.get(
     "",
@@ -35,6 +55,9 @@ router = APIRouter(
 )
 async def client_accounts(user_data: dict = Depends(token_check)):
     try:
+        if passthrough_enabled("/accounts"):
+            content = await get_client_accounts_raw(user_data['user_id'], user_data['role'])
+            return passthrough_response("/accounts", content, ACCOUNT_LIST)
         accounts = await get_client_accounts(user_data['user_id'], user_data['role'])
         return accounts
     except httpx.HTTPStatusError as exc:
@@ -53,6 +76,9 @@ async def client_accounts(user_data: dict = Depends(token_check)):
 async def client_accounts_concrete(client_id: UUID, user_data: dict = Depends(token_check)):
     try:
         if user_data['role'] == 'EMPLOYEE':
+            if passthrough_enabled("/accounts/concrete"):
+                content = await get_client_accounts_raw(str(client_id), user_data['role'])
+                return passthrough_response("/accounts/concrete", content, ACCOUNT_LIST)
             accounts = await get_client_accounts(str(client_id), user_data['role'])
             return accounts
         else:
@@ -112,10 +138,16 @@ async def withdraw(
 )
 async def transactions(
         account_id: str = Path(..., description="ID счета"),
+        cursor: Optional[str] = Query(None, description="Курсор страницы, передаётся сервису счетов"),
+        limit: Optional[int] = Query(None, ge=1, le=1000, description="Размер страницы"),
+        stream: bool = Query(False, description="Отдавать транзакции потоком в формате NDJSON"),
         user_data: dict = Depends(token_check)
 ):
     try:
-        txs = await get_transactions(account_id, user_data['user_id'], user_data['role'])
+        if stream:
+            txs = await stream_transactions(account_id, user_data['user_id'], user_data['role'], cursor, limit)
+            return StreamingResponse(_ndjson(txs), media_type="application/x-ndjson")
+        txs = await get_transactions(account_id, user_data['user_id'], user_data['role'], cursor, limit)
         return txs
     except httpx.HTTPStatusError as exc:
         raise HTTPException(status_code=exc.response.status_code, detail=exc.response.text)
@@ -186,14 +218,17 @@ async def set_primary_account_endpoint(account_id: str = Path(..., description="
     "/{account_id}/transfer/by-account",
     responses={
         200: {"description": "Transfer processed successfully or is in processing"},
+        202: {"description": "Transfer accepted, poll /accounts/transfers/{transfer_id} for the result"},
         400: {"description": "Bad request"},
         422: {"description": "Validation error"},
         500: {"description": "Internal server error"}
     }
 )
 async def transfer_by_account(
+    response: Response,
     account_id: UUID = Path(..., description="ID счета отправителя"),
     data: TransferByAccountReq = Depends(),
+    async_mode: bool = Query(False, alias="async", description="Не ждать результата перевода"),
     user_data: dict = Depends(token_check)
 ):
     try:
@@ -202,9 +237,10 @@ async def transfer_by_account(
             to_account_id=str(data.to_account),
             client_id=user_data['user_id'],
             amount=data.amount,
-            role=user_data['role']
+            role=user_data['role'],
+            wait=not async_mode
         )
-        return {"message": message}
+        return _transfer_response(message, async_mode, response)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
@@ -213,27 +249,29 @@ async def transfer_by_account(
     "/{account_id}/transfer/by-phone-number",
     responses={
         200: {"description": "Transfer processed successfully or is in processing"},
+        202: {"description": "Transfer accepted, poll /accounts/transfers/{transfer_id} for the result"},
         400: {"description": "Bad request"},
         422: {"description": "Validation error"},
         500: {"description": "Internal server error"}
     }
 )
 async def transfer_by_phone_number(
+    response: Response,
     account_id: UUID = Path(..., description="ID счета отправителя"),
     data: TransferByPhoneNumberReq = Depends(),
+    async_mode: bool = Query(False, alias="async", description="Не ждать результата перевода"),
     user_data: dict = Depends(token_check)
 ):
     try:
-        user_id = await get_account_id_by_phone(data.phone_number)
-
-        message = await transfer_funds_by_client(
+        message = await transfer_funds_by_phone(
             from_account_id=str(account_id),
-            to_client_id=str(user_id),
+            phone_number=data.phone_number,
             client_id=user_data['user_id'],
             amount=data.amount,
-            role=user_data['role']
+            role=user_data['role'],
+            wait=not async_mode
         )
-        return {"message": message}
+        return _transfer_response(message, async_mode, response)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
@@ -242,14 +280,17 @@ async def transfer_by_phone_number(
     "/{account_id}/transfer/by-account-number",
     responses={
         200: {"description": "Transfer processed successfully or is in processing"},
+        202: {"description": "Transfer accepted, poll /accounts/transfers/{transfer_id} for the result"},
         400: {"description": "Bad request"},
         422: {"description": "Validation error"},
         500: {"description": "Internal server error"}
     }
 )
 async def transfer_by_account_number(
+    response: Response,
     account_id: UUID = Path(..., description="ID счета отправителя"),
     data: TransferByAccountNumberReq = Depends(),
+    async_mode: bool = Query(False, alias="async", description="Не ждать результата перевода"),
     user_data: dict = Depends(token_check)
 ):
     try:
@@ -258,8 +299,28 @@ async def transfer_by_account_number(
             to_account_number=str(data.to_account_number),
             client_id=user_data['user_id'],
             amount=data.amount,
-            role=user_data['role']
+            role=user_data['role'],
+            wait=not async_mode
         )
-        return {"message": message}
+        return _transfer_response(message, async_mode, response)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.get(
+    "/transfers/{transfer_id}",
+    response_model=TransferStatusDTO,
+    responses={
+        404: {"description": "Transfer not found"},
+        422: {"description": "Validation error"},
+        500: {"description": "Internal server error"}
+    }
+)
+async def transfer_status(
+    transfer_id: UUID = Path(..., description="ID перевода"),
+    user_data: dict = Depends(token_check)
+):
+    status = get_transfer_status(str(transfer_id), user_data['user_id'])
+    if status is None:
+        raise HTTPException(status_code=404, detail="Transfer not found")
+    return status
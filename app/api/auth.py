@@ -5,11 +5,13 @@ import httpx
 
 from app.dependencies import token_check
 from app.models.schemas import CredentialsDTO
+from app.utils.metrics import TimedRoute
 
 
 router = APIRouter(
     prefix="/auth",
-    tags=["Auth"]
+    tags=["Auth"],
+    route_class=TimedRoute
 )
 
 
@@ -0,0 +1,102 @@
+import asyncio
+from typing import Dict, List, Tuple
+
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core.config import settings
+from app.dependencies import authenticated_token, security, token_check
+from app.models.schemas import BatchItemResp, BatchReq, BatchSubRequest
+from app.utils import codec, deadline
+from app.utils.metrics import TimedRoute
+
+router = APIRouter(
+    prefix="/batch",
+    tags=["Batch"],
+    route_class=TimedRoute
+)
+
+
+def _dedup_key(sub_request: BatchSubRequest) -> Tuple:
+    return sub_request.path, tuple(sorted((key, str(value)) for key, value in sub_request.query.items()))
+
+
+async def _execute(client: httpx.AsyncClient, sub_request: BatchSubRequest, headers: Dict[str, str],
+                   semaphore: asyncio.Semaphore) -> BatchItemResp:
+    if not sub_request.path.startswith("/"):
+        return BatchItemResp(status=400, body={"detail": "Unsupported path"})
+
+    content = None
+    request_headers = {**headers, **deadline.propagation_headers()}
+    if sub_request.body is not None:
+        content = codec.dumps(sub_request.body)
+        request_headers["Content-Type"] = "application/json"
+
+    request = client.build_request(
+        sub_request.method.upper(),
+        sub_request.path,
+        params=sub_request.query,
+        content=content,
+        headers=request_headers
+    )
+    # Проверяется уже нормализованный путь: /./batch и /%62atch тоже ведут в /batch
+    if request.url.path == router.prefix or request.url.path.startswith(f"{router.prefix}/"):
+        return BatchItemResp(status=400, body={"detail": "Unsupported path"})
+
+    async with semaphore:
+        response = await client.send(request)
+
+    body = None
+    if response.content:
+        if response.headers.get("content-type", "").startswith("application/json"):
+            body = codec.loads(response.content)
+        else:
+            body = response.text
+    return BatchItemResp(status=response.status_code, body=body)
+
+
+@router.post(
+    "",
+    response_model=List[BatchItemResp],
+    responses={
+        400: {"description": "Too many sub-requests or nested batch"},
+        401: {"description": "Bad token"},
+        422: {"description": "Validation error"},
+        500: {"description": "Internal server error"}
+    }
+)
+async def batch(
+    data: BatchReq,
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    user_data: dict = Depends(token_check)
+):
+    """
+    Выполняет несколько запросов к API шлюза за один HTTP-запрос.
+    Токен проверяется один раз, вложенные запросы выполняются параллельно
+    с ограничением BATCH_CONCURRENCY, одинаковые GET-запросы выполняются один раз.
+    Статус и тело каждого вложенного запроса возвращаются в порядке запросов.
+    """
+    if authenticated_token.get() is not None:
+        raise HTTPException(status_code=400, detail="Nested batch requests are not allowed")
+    if len(data.requests) > settings.batch_max_requests:
+        raise HTTPException(status_code=400, detail=f"At most {settings.batch_max_requests} requests per batch")
+
+    authenticated_token.set((credentials.credentials, user_data))
+    headers = {"Authorization": f"{credentials.scheme} {credentials.credentials}"}
+    semaphore = asyncio.Semaphore(settings.batch_concurrency)
+
+    transport = httpx.ASGITransport(app=request.app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        tasks: Dict[Tuple, asyncio.Future] = {}
+        items = []
+        for sub_request in data.requests:
+            if sub_request.method.upper() != "GET":
+                items.append(asyncio.ensure_future(_execute(client, sub_request, headers, semaphore)))
+                continue
+            key = _dedup_key(sub_request)
+            if key not in tasks:
+                tasks[key] = asyncio.ensure_future(_execute(client, sub_request, headers, semaphore))
+            items.append(tasks[key])
+        return await asyncio.gather(*items)
@@ -1,27 +1,32 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from uuid import UUID
-from typing import List
+from typing import List, Optional
 import httpx
 
 from app.dependencies import token_check
 from app.models.schemas import (
     CreditTariffDTO,
     TakeCreditDTO,
-    CreditDTO, TakeCreditAPIDTO, LimitDTO, UuidDTO, CreditPaymentDTO, ShortCreditTariffDTO, MessageDTO
+    CreditDTO, TakeCreditAPIDTO, LimitDTO, UuidDTO, CreditPaymentDTO, ShortCreditTariffDTO, MessageDTO,
+    ExpandedCreditDTO
 )
 from app.services.credit_service import (
     get_tariffs,
     get_tariff,
     get_credit_limits,
     take_credit,
-    get_credit, get_credit_payment_history, get_credits
+    get_credit, get_credit_payment_history, get_credits, get_credits_expanded
 )
+from app.utils.metrics import TimedRoute
 
 router = APIRouter(
     prefix="/credit",
-    tags=["Credit"]
+    tags=["Credit"],
+    route_class=TimedRoute
 )
 
+EXPANDABLE_FIELDS = {"tariff", "history"}
+
 
 @router.get("/tariffs", response_model=List[ShortCreditTariffDTO])
 async def api_get_tariffs(_: dict = Depends(token_check)):
@@ -72,12 +77,21 @@ async def api_take_credit(data: TakeCreditDTO, user_data: dict = Depends(token_c
         raise HTTPException(status_code=exc.response.status_code, detail=exc.response.text)
 
 
-@router.get("", response_model=List[CreditDTO])
-async def api_get_credits(user_data: dict = Depends(token_check)):
+@router.get("", response_model=List[ExpandedCreditDTO], response_model_exclude_none=True)
+async def api_get_credits(
+    expand: Optional[str] = Query(None, description="Дополнительные поля через запятую: tariff, history"),
+    user_data: dict = Depends(token_check)
+):
     """
     Получает информацию о кредитах пользователя.
+    С expand=tariff,history сразу подставляет тарифы и историю платежей по каждому кредиту.
     """
     try:
+        if expand:
+            fields = {field.strip() for field in expand.split(",") if field.strip()}
+            if not fields <= EXPANDABLE_FIELDS:
+                raise HTTPException(status_code=400, detail=f"Unknown expand fields: {', '.join(sorted(fields - EXPANDABLE_FIELDS))}")
+            return await get_credits_expanded(UUID(user_data['user_id']), fields)
         return await get_credits(UUID(user_data['user_id']))
     except httpx.HTTPStatusError as exc:
         raise HTTPException(status_code=exc.response.status_code, detail=exc.response.text)
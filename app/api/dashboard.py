@@ -0,0 +1,68 @@
+import asyncio
+from typing import Any, Awaitable, Dict
+from uuid import UUID
+
+import httpx
+from fastapi import APIRouter, Depends
+
+from app.core.config import settings
+from app.dependencies import token_check
+from app.models.schemas import DashboardResp, SectionErrorDTO
+from app.services.account_service import get_client_accounts
+from app.services.client_service import get_client_profile
+from app.services.credit_service import get_credits, get_credit_limits
+from app.utils import deadline
+from app.utils.metrics import TimedRoute
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["Dashboard"],
+    route_class=TimedRoute
+)
+
+
+async def _section(call: Awaitable[Any]) -> Any:
+    timeout = settings.dashboard_section_timeout
+    left = deadline.remaining()
+    if left is not None:
+        timeout = max(min(timeout, left), 0)
+    try:
+        return await asyncio.wait_for(call, timeout=timeout)
+    except httpx.HTTPStatusError as exc:
+        return SectionErrorDTO(status_code=exc.response.status_code, detail=exc.response.text)
+    except asyncio.TimeoutError:
+        return SectionErrorDTO(status_code=504, detail="Section timed out")
+    except Exception:
+        return SectionErrorDTO(status_code=500, detail="Internal server error")
+
+
+@router.get(
+    "",
+    response_model=DashboardResp,
+    responses={
+        401: {"description": "Bad token"},
+        500: {"description": "Internal server error"}
+    }
+)
+async def get_dashboard(user_data: dict = Depends(token_check)):
+    """
+    Собирает данные главного экрана одним запросом: профиль, счета, кредиты и кредитный лимит.
+    Разделы запрашиваются параллельно; если какой-то сервис ответил ошибкой или не успел,
+    остальные разделы всё равно возвращаются, а ошибка попадает в errors.
+    """
+    user_id = user_data['user_id']
+    sections: Dict[str, Awaitable[Any]] = {
+        "profile": get_client_profile(user_id),
+        "accounts": get_client_accounts(user_id, user_data['role']),
+        "credits": get_credits(UUID(user_id)),
+        "credit_limit": get_credit_limits(UUID(user_id)),
+    }
+    results = await asyncio.gather(*[_section(call) for call in sections.values()])
+
+    dashboard = DashboardResp()
+    for name, result in zip(sections, results):
+        if isinstance(result, SectionErrorDTO):
+            dashboard.errors[name] = result
+        else:
+            setattr(dashboard, name, result)
+    return dashboard
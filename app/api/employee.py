@@ -2,24 +2,30 @@ from uuid import UUID
 
 from fastapi import APIRouter, HTTPException, Depends, Query, Path
 import httpx
+from pydantic import TypeAdapter
 from typing import List
 from app.models.schemas import (
     CreateUserReq, UserDTO, CreateCreditTariffDTO, CreateCreditTariffAPIDTO, EditCreditTariffDTO, UuidDTO
 )
-from app.services.credit_service import edit_tariff, add_tariff, delete_tariff
+from app.services.credit_service import edit_tariff, add_tariff, delete_tariff, invalidate_tariffs_cache
 from app.services.employee_service import (
     get_employees,
     get_clients,
     set_user_active,
-    create_user, get_users
+    create_user, get_users, get_employees_raw, get_users_raw, get_clients_raw
 )
 from app.dependencies import token_check
+from app.utils.passthrough import passthrough_enabled, passthrough_response
+from app.utils.metrics import TimedRoute
 
 router = APIRouter(
     prefix="/employee",
-    tags=["Employee"]
+    tags=["Employee"],
+    route_class=TimedRoute
 )
 
+USER_LIST = TypeAdapter(List[UserDTO])
+
 
 @router.get(
     "",
@@ -36,6 +42,8 @@ async def get_employee(user_data: dict = Depends(token_check)):
     """
     try:
         if user_data['role'] == 'EMPLOYEE':
+            if passthrough_enabled("/employee"):
+                return passthrough_response("/employee", await get_employees_raw(), USER_LIST)
             employees = await get_employees()
             return employees
         else:
@@ -59,6 +67,8 @@ async def get_users_endpoint(user_data: dict = Depends(token_check)):
     """
     try:
         if user_data['role'] == 'EMPLOYEE':
+            if passthrough_enabled("/employee/users"):
+                return passthrough_response("/employee/users", await get_users_raw(), USER_LIST)
             users = await get_users()
             return users
         else:
@@ -81,6 +91,8 @@ async def get_clients_endpoint(user_data: dict = Depends(token_check)):
     """
     try:
         if user_data['role'] == 'EMPLOYEE':
+            if passthrough_enabled("/employee/clients"):
+                return passthrough_response("/employee/clients", await get_clients_raw(), USER_LIST)
             clients = await get_clients()
             return clients
         else:
@@ -152,7 +164,9 @@ async def api_add_tariff(data: CreateCreditTariffDTO, user_data: dict = Depends(
                 employee_id=UUID(user_data['user_id'])
             )
 
-            return await add_tariff(api_data)
+            tariff = await add_tariff(api_data)
+            await invalidate_tariffs_cache()
+            return tariff
         else:
             raise HTTPException(status_code=403, detail='No permission')
     except httpx.HTTPStatusError as exc:
@@ -166,7 +180,9 @@ async def api_edit_tariff(tariff_id: UUID, data: EditCreditTariffDTO, user_data:
     """
     try:
         if user_data['role'] == 'EMPLOYEE':
-            return await edit_tariff(data, tariff_id)
+            tariff = await edit_tariff(data, tariff_id)
+            await invalidate_tariffs_cache(tariff_id)
+            return tariff
         else:
             raise HTTPException(status_code=403, detail='No permission')
     except httpx.HTTPStatusError as exc:
@@ -180,7 +196,9 @@ async def api_delete_tariff(tariff_id: UUID, user_data: dict = Depends(token_che
     """
     try:
         if user_data['role'] == 'EMPLOYEE':
-            return await delete_tariff(tariff_id)
+            tariff = await delete_tariff(tariff_id)
+            await invalidate_tariffs_cache(tariff_id)
+            return tariff
         else:
             raise HTTPException(status_code=403, detail='No permission')
     except httpx.HTTPStatusError as exc:
@@ -6,10 +6,12 @@ from app.models.schemas import (
 )
 from app.dependencies import token_check
 from app.services.exange_service import get_currencies, do_exchange
+from app.utils.metrics import TimedRoute
 
 router = APIRouter(
     prefix="/currency",
-    tags=["Currency"]
+    tags=["Currency"],
+    route_class=TimedRoute
 )
 
 
@@ -4,10 +4,12 @@ from fastapi import APIRouter, HTTPException, Depends
 from app.dependencies import token_check
 from app.models.schemas import LoginReq, RegisterReq, JwtToken, ProfileResp
 from app.services.client_service import login_client, register_client, get_client_profile
+from app.utils.metrics import TimedRoute
 
 router = APIRouter(
     prefix="/user",
-    tags=["User"]
+    tags=["User"],
+    route_class=TimedRoute
 )
 
 
@@ -1,4 +1,7 @@
+import json
 import os
+from typing import Dict, List
+
 from pydantic_settings import BaseSettings
 
 
@@ -15,5 +18,78 @@ class Settings(BaseSettings):
     retries: int = int(os.environ['RETRIES'])
     wait_seconds: int = int(os.environ['WAIT_SECONDS'])
 
+    environment: str = os.environ.get('ENVIRONMENT', 'production')
+    server_workers: int = int(os.environ.get('SERVER_WORKERS', 1))
+    server_backlog: int = int(os.environ.get('SERVER_BACKLOG', 2048))
+    server_keepalive_timeout: int = int(os.environ.get('SERVER_KEEPALIVE_TIMEOUT', 5))
+    server_graceful_shutdown_timeout: int = int(os.environ.get('SERVER_GRACEFUL_SHUTDOWN_TIMEOUT', 30))
+
+    request_deadline_seconds: float = float(os.environ.get('REQUEST_DEADLINE_SECONDS', 30))
+    route_deadlines: Dict[str, float] = json.loads(os.environ.get('ROUTE_DEADLINES', '{}'))
+
+    retry_backoff_base: float = float(os.environ.get('RETRY_BACKOFF_BASE', 0.1))
+    retry_budget_ratio: float = float(os.environ.get('RETRY_BUDGET_RATIO', 0.1))
+    retry_budget_max_tokens: float = float(os.environ.get('RETRY_BUDGET_MAX_TOKENS', 10))
+
+    amqp_channel_pool_size: int = int(os.environ.get('AMQP_CHANNEL_POOL_SIZE', 10))
+    transfer_reply_timeout: float = float(os.environ.get('TRANSFER_REPLY_TIMEOUT', 5))
+    transfer_result_ttl: float = float(os.environ.get('TRANSFER_RESULT_TTL', 600))
+    transfer_result_store_size: int = int(os.environ.get('TRANSFER_RESULT_STORE_SIZE', 10000))
+
+    token_cache_ttl: float = float(os.environ.get('TOKEN_CACHE_TTL', 60))
+    token_cache_size: int = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+    jwt_verification_mode: str = os.environ.get('JWT_VERIFICATION_MODE', 'remote')
+    jwt_public_key: str = os.environ.get('JWT_PUBLIC_KEY', '')
+    jwt_jwks_url: str = os.environ.get('JWT_JWKS_URL', '')
+    jwt_jwks_refresh_seconds: float = float(os.environ.get('JWT_JWKS_REFRESH_SECONDS', 300))
+    jwt_algorithms: str = os.environ.get('JWT_ALGORITHMS', 'RS256')
+    jwt_revocation_check: bool = os.environ.get('JWT_REVOCATION_CHECK', 'false').lower() == 'true'
+
+    phone_cache_size: int = int(os.environ.get('PHONE_CACHE_SIZE', 10000))
+    phone_cache_ttl: float = float(os.environ.get('PHONE_CACHE_TTL', 300))
+    phone_cache_negative_ttl: float = float(os.environ.get('PHONE_CACHE_NEGATIVE_TTL', 30))
+
+    cache_backend: str = os.environ.get('CACHE_BACKEND', 'memory')
+    redis_url: str = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    cache_key_prefix: str = os.environ.get('CACHE_KEY_PREFIX', 'gateway:')
+    cache_invalidation_channel: str = os.environ.get('CACHE_INVALIDATION_CHANNEL', 'gateway:cache-invalidation')
+    cache_local_ttl: float = float(os.environ.get('CACHE_LOCAL_TTL', 5))
+    cache_max_size: int = int(os.environ.get('CACHE_MAX_SIZE', 1000))
+    cache_stale_seconds: float = float(os.environ.get('CACHE_STALE_SECONDS', 60))
+    tariffs_cache_ttl: float = float(os.environ.get('TARIFFS_CACHE_TTL', 60))
+    currencies_cache_ttl: float = float(os.environ.get('CURRENCIES_CACHE_TTL', 300))
+
+    circuit_window_size: int = int(os.environ.get('CIRCUIT_WINDOW_SIZE', 20))
+    circuit_minimum_calls: int = int(os.environ.get('CIRCUIT_MINIMUM_CALLS', 10))
+    circuit_failure_rate_threshold: float = float(os.environ.get('CIRCUIT_FAILURE_RATE_THRESHOLD', 0.5))
+    circuit_slow_call_rate_threshold: float = float(os.environ.get('CIRCUIT_SLOW_CALL_RATE_THRESHOLD', 0.8))
+    circuit_slow_call_seconds: float = float(os.environ.get('CIRCUIT_SLOW_CALL_SECONDS', 3))
+    circuit_open_seconds: float = float(os.environ.get('CIRCUIT_OPEN_SECONDS', 30))
+    circuit_half_open_calls: int = int(os.environ.get('CIRCUIT_HALF_OPEN_CALLS', 3))
+
+    metrics_max_routes_per_service: int = int(os.environ.get('METRICS_MAX_ROUTES_PER_SERVICE', 100))
+    prometheus_multiproc_dir: str = os.environ.get('PROMETHEUS_MULTIPROC_DIR', '')
+
+    tracing_exporter: str = os.environ.get('TRACING_EXPORTER', 'none')
+    tracing_sample_rate: float = float(os.environ.get('TRACING_SAMPLE_RATE', 0.1))
+    tracing_file_path: str = os.environ.get('TRACING_FILE_PATH', 'traces.jsonl')
+    tracing_service_name: str = os.environ.get('TRACING_SERVICE_NAME', 'bank-api-gateway')
+
+    passthrough_routes: List[str] = json.loads(os.environ.get('PASSTHROUGH_ROUTES', '[]'))
+    passthrough_validation_sample_rate: float = float(os.environ.get('PASSTHROUGH_VALIDATION_SAMPLE_RATE', 0.01))
+
+    dashboard_section_timeout: float = float(os.environ.get('DASHBOARD_SECTION_TIMEOUT', 3))
+    batch_max_requests: int = int(os.environ.get('BATCH_MAX_REQUESTS', 100))
+    batch_concurrency: int = int(os.environ.get('BATCH_CONCURRENCY', 10))
+
+    http2_enabled: bool = os.environ.get('HTTP2_ENABLED', 'true').lower() == 'true'
+    http_max_connections: int = int(os.environ.get('HTTP_MAX_CONNECTIONS', 100))
+    http_max_keepalive_connections: int = int(os.environ.get('HTTP_MAX_KEEPALIVE_CONNECTIONS', 20))
+    http_keepalive_expiry: float = float(os.environ.get('HTTP_KEEPALIVE_EXPIRY', 30))
+    user_service_timeout: float = float(os.environ.get('USER_SERVICE_TIMEOUT', 5))
+    account_service_timeout: float = float(os.environ.get('ACCOUNT_SERVICE_TIMEOUT', 5))
+    credit_service_timeout: float = float(os.environ.get('CREDIT_SERVICE_TIMEOUT', 5))
+    exchange_service_timeout: float = float(os.environ.get('EXCHANGE_SERVICE_TIMEOUT', 5))
+
 
 settings = Settings()
@@ -1,28 +1,116 @@
-from typing import Dict
+import base64
+import hashlib
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
 
+import httpx
+import jwt
 from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import httpx
+from prometheus_client import Counter
 from app.core.config import settings
+from app.utils import codec, deadline, metrics, tracing
+from app.utils.http_client import http_clients
+from app.utils.jwt_verifier import jwt_verifier
+from app.utils.ttl_cache import TTLCache
 
 security = HTTPBearer()
 
+# Заполняется эндпоинтом /batch: вложенные запросы с тем же токеном не проверяются повторно
+authenticated_token: ContextVar[Optional[Tuple[str, Dict]]] = ContextVar("authenticated_token", default=None)
 
-async def token_check(credentials: HTTPAuthorizationCredentials = Security(security)) -> Dict:
+token_cache = TTLCache(maxsize=settings.token_cache_size, ttl=settings.token_cache_ttl)
+
+token_cache_requests_total = Counter(
+    "token_cache_requests_total",
+    "Token verification cache lookups",
+    ["result"]
+)
+
+
+def _token_expires_at(token: str) -> Optional[float]:
     """
-    Проверяет JWT-токен через сервис employee.
-    Возвращает user_id, если токен валиден.
+    Достаёт claim exp из payload JWT без проверки подписи.
+    Используется только для ограничения времени жизни записи в кэше.
     """
-    token = credentials.credentials
-    async with httpx.AsyncClient() as client:
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = codec.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
+
+
+async def _remote_token_check(token: str) -> Dict:
+    url = f"{settings.user_service_url}/token/check"
+    client = http_clients.get_client(url)
+    try:
         response = await client.post(
-            f"{settings.user_service_url}/token/check",
-            params={"token": token}
+            url,
+            params={"token": token},
+            headers={**deadline.propagation_headers(), **tracing.propagation_headers()},
+            timeout=deadline.hop_timeout(client.timeout, "post", url)
         )
+    except deadline.DeadlineExceededError as exc:
+        raise HTTPException(status_code=504, detail=exc.response.text)
+    except httpx.TimeoutException:
+        if deadline.expired():
+            raise HTTPException(status_code=504, detail="Request deadline exceeded")
+        raise
     if response.status_code != 200:
         raise HTTPException(status_code=response.status_code, detail=response.text)
-    data = response.json()
+    data = codec.loads(response.content)
     return {
         "user_id": data["user_id"],
         "role": data["role"]
     }
+
+
+async def _local_token_check(token: str) -> Optional[Dict]:
+    try:
+        claims = await jwt_verifier.verify(token)
+    except jwt.InvalidTokenError as exc:
+        raise HTTPException(status_code=401, detail=str(exc))
+    if claims is None:
+        return None
+    return {
+        "user_id": str(claims["user_id"]),
+        "role": claims["role"]
+    }
+
+
+async def token_check(credentials: HTTPAuthorizationCredentials = Security(security)) -> Dict:
+    """
+    Проверяет JWT-токен локально по публичному ключу или через сервис employee.
+    Возвращает user_id, если токен валиден.
+    Подтверждённые токены кэшируются, но не дольше их срока действия.
+    """
+    with metrics.phase_timer("auth"), tracing.tracer.start_span("token_check"):
+        token = credentials.credentials
+        authenticated = authenticated_token.get()
+        if authenticated is not None and authenticated[0] == token:
+            return dict(authenticated[1])
+
+        cache_key = hashlib.sha256(token.encode()).hexdigest()
+
+        cached = token_cache.get(cache_key)
+        if cached is not None:
+            token_cache_requests_total.labels(result="hit").inc()
+            return dict(cached)
+        token_cache_requests_total.labels(result="miss").inc()
+
+        user_data = None
+        if jwt_verifier.enabled:
+            user_data = await _local_token_check(token)
+        if user_data is None or settings.jwt_revocation_check:
+            user_data = await _remote_token_check(token)
+
+        ttl = settings.token_cache_ttl
+        expires_at = _token_expires_at(token)
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        token_cache.set(cache_key, user_data, ttl=ttl)
+
+        return dict(user_data)
@@ -1,22 +1,66 @@
+import logging
+import math
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
 
+from contextlib import asynccontextmanager
+from typing import Optional
+
 import uvicorn
 from fastapi import FastAPI, Response
-from app.api import user, account, employee, auth, exchange, credit
+from fastapi.datastructures import Default
+from app.api import user, account, employee, auth, exchange, credit, dashboard, batch
 from fastapi.middleware.cors import CORSMiddleware
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from app.core.config import settings
+from app.utils.amqp import amqp_pool
+from app.utils.codec import CodecJSONResponse
+from app.utils.deadline import DeadlineMiddleware
+from app.utils.http_client import http_clients
+from app.utils import metrics as gateway_metrics
+from app.utils.metrics import MetricsMiddleware
+from app.utils.response_cache import response_cache
+from app.utils.tracing import TracingMiddleware, tracer
+
 
+logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Bank API Gateway", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    if gateway_metrics.multiprocess_enabled():
+        gateway_metrics.cleanup_dead_workers()
+    await http_clients.start()
+    await amqp_pool.start()
+    await response_cache.start()
+    try:
+        yield
+    finally:
+        await response_cache.close()
+        await amqp_pool.close()
+        await http_clients.close()
+        tracer.close()
+        if gateway_metrics.multiprocess_enabled():
+            gateway_metrics.mark_worker_dead()
+
+
+# Default(...) оставляет FastAPI быстрый путь сериализации через pydantic для маршрутов с response_model,
+# а ответы без response_model рендерятся через orjson
+app = FastAPI(
+    title="Bank API Gateway",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=Default(CodecJSONResponse)
+)
 
 
 @app.get("/metrics")
 def metrics():
-    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return Response(content=gateway_metrics.render_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 
 app.include_router(user.router)
@@ -25,6 +69,8 @@ app.include_router(employee.router)
 app.include_router(auth.router)
 app.include_router(exchange.router)
 app.include_router(credit.router)
+app.include_router(dashboard.router)
+app.include_router(batch.router)
 
 origins = ["*"]
 
@@ -35,7 +81,83 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(DeadlineMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+
+
+def _cgroup_cpu_limit() -> Optional[int]:
+    """
+    Ограничение CPU контейнера (--cpus) по cgroup v2 или v1, округлённое вверх.
+    """
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as file:
+            quota, period = file.read().split()[:2]
+    except OSError:
+        try:
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as file:
+                quota = file.read().strip()
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as file:
+                period = file.read().strip()
+        except OSError:
+            return None
+    if quota in ("max", "-1"):
+        return None
+    return max(1, math.ceil(int(quota) / int(period)))
+
+
+def worker_count() -> int:
+    if settings.server_workers > 0:
+        return settings.server_workers
+    # sched_getaffinity учитывает cpuset, но не квоту CPU контейнера
+    count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    return min(count, limit) if limit is not None else count
+
+
+def _check_multi_worker() -> None:
+    """
+    Несколько воркеров допустимы только с общим кэшем и общими метриками.
+    Статусы асинхронных переводов и кэш номеров телефонов остаются в памяти
+    воркера, поэтому перед ними нужна балансировка с привязкой клиента к воркеру.
+    """
+    if settings.cache_backend != "redis":
+        raise RuntimeError("SERVER_WORKERS > 1 requires CACHE_BACKEND=redis")
+    if not gateway_metrics.multiprocess_enabled():
+        raise RuntimeError("SERVER_WORKERS > 1 requires PROMETHEUS_MULTIPROC_DIR")
+    logger.warning(
+        "Running several workers: async transfer statuses and phone lookups are cached per worker, "
+        "route clients to the same worker"
+    )
+
+
+def run() -> None:
+    if gateway_metrics.multiprocess_enabled():
+        gateway_metrics.prepare_multiprocess_dir()
+
+    host, port = os.environ['SERVER_HOST'], int(os.environ['SERVER_PORT'])
+    if settings.environment == "development":
+        uvicorn.run("app.main:app", host=host, port=port, reload=True)
+        return
+
+    workers = worker_count()
+    if workers > 1:
+        _check_multi_worker()
+
+    # Перед остановкой uvicorn ждёт завершения открытых запросов, в том числе
+    # синхронных переводов, ожидающих ответа, не дольше SERVER_GRACEFUL_SHUTDOWN_TIMEOUT
+    uvicorn.run(
+        "app.main:app",
+        host=host,
+        port=port,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        backlog=settings.server_backlog,
+        timeout_keep_alive=settings.server_keepalive_timeout,
+        timeout_graceful_shutdown=settings.server_graceful_shutdown_timeout
+    )
 
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host=os.environ['SERVER_HOST'], port=int(os.environ['SERVER_PORT']), reload=True)
+    run()
@@ -2,7 +2,7 @@ from datetime import datetime
 from uuid import UUID
 
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 
 class LoginReq(BaseModel):
@@ -88,6 +88,16 @@ class TransferByAccountNumberReq(BaseModel):
     amount: float
 
 
+class TransferAcceptedDTO(BaseModel):
+    transfer_id: UUID
+    status: str
+
+
+class TransferStatusDTO(BaseModel):
+    id: UUID
+    status: str  # "processing", "successful" или "failed"
+
+
 class DoExchangeReq(BaseModel):
     currencyFrom: str
     currencyTo: str
@@ -172,3 +182,37 @@ class CreditPaymentDTO(BaseModel):
     summ: float
     status: bool
     payment_date: datetime
+
+
+class ExpandedCreditDTO(CreditDTO):
+    tariff: Optional[CreditTariffDTO] = None
+    history: Optional[List[CreditPaymentDTO]] = None
+
+
+class SectionErrorDTO(BaseModel):
+    status_code: int
+    detail: str
+
+
+class DashboardResp(BaseModel):
+    profile: Optional[ProfileResp] = None
+    accounts: Optional[List[AccountDTO]] = None
+    credits: Optional[List[CreditDTO]] = None
+    credit_limit: Optional[LimitDTO] = None
+    errors: Dict[str, SectionErrorDTO] = {}
+
+
+class BatchSubRequest(BaseModel):
+    method: str = "GET"
+    path: str
+    query: Dict[str, Any] = {}
+    body: Optional[Any] = None
+
+
+class BatchReq(BaseModel):
+    requests: List[BatchSubRequest]
+
+
+class BatchItemResp(BaseModel):
+    status: int
+    body: Optional[Any] = None
@@ -1,73 +1,153 @@
 import asyncio
-import json
 import uuid
+from contextlib import AsyncExitStack
+from functools import partial
+from uuid import UUID
 
 import httpx
-from typing import List
+from typing import AsyncIterator, Awaitable, List, Optional
 from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_exception_type
 from app.core.config import settings
-from app.models.schemas import AccountDTO, TransactionDTO
+from app.models.schemas import AccountDTO, TransactionDTO, TransferStatusDTO
 import aio_pika
 from aio_pika import Message, DeliveryMode
 
-from app.utils.http_retry import http_request_with_retry
+from app.services.client_service import get_account_id_by_phone
+from app.utils import codec, deadline, tracing
+from app.utils.amqp import amqp_pool
+from app.utils.http_retry import UpstreamResponse, http_request_with_retry, http_stream_with_retry
+from app.utils.json_stream import iter_json_array
+from app.utils.ttl_cache import TTLCache
 
 
 RETRIES = settings.retries
 WAIT_SECONDS = settings.wait_seconds
 
 
-@retry(stop=stop_after_attempt(RETRIES), wait=wait_fixed(WAIT_SECONDS), retry=retry_if_exception_type(aio_pika.exceptions.AMQPException))
-async def _transfer_funds(transfer_data: dict) -> str:
-    try:
-        connection = await aio_pika.connect_robust(
-            host=settings.rabbitmq_account_host,
-            port=int(settings.rabbitmq_account_port),
-            login=settings.rabbitmq_account_login,
-            password=settings.rabbitmq_account_password
+transfer_results = TTLCache(maxsize=settings.transfer_result_store_size, ttl=settings.transfer_result_ttl)
+
+
+def _transfer_status(response_data: dict) -> str:
+    return "successful" if response_data.get("result") else "failed"
+
+
+@retry(stop=stop_after_attempt(RETRIES) | deadline.stop_at_deadline(), wait=wait_fixed(WAIT_SECONDS), retry=retry_if_exception_type(aio_pika.exceptions.AMQPException))
+async def _publish_transfer(transfer_data: dict, correlation_id: str,
+                            recipient: Optional[Awaitable[dict]] = None) -> None:
+    left = deadline.remaining()
+    if left is not None and left <= 0:
+        raise deadline.DeadlineExceededError(
+            "publish",
+            f"amqp://{settings.rabbitmq_account_host}:{settings.rabbitmq_account_port}/{settings.transfer_queue_name}"
         )
-        async with connection:
-            channel = await connection.channel()
-            await channel.declare_queue(settings.transfer_queue_name, durable=True)
-            callback_queue = await channel.declare_queue(exclusive=True)
 
-            correlation_id = str(uuid.uuid4())
-            message_body = json.dumps(transfer_data).encode()
+    attributes = {
+        "messaging.system": "rabbitmq",
+        "messaging.destination": settings.transfer_queue_name,
+        "messaging.message_id": correlation_id,
+    }
+    with tracing.tracer.start_span("amqp publish", kind="producer", attributes=attributes):
+        # Получатель дорезолвливается параллельно с подключением, но до захвата канала из пула,
+        # чтобы медленный поиск по телефону не занимал канал
+        if recipient is not None:
+            resolved, _ = await asyncio.gather(recipient, amqp_pool.ensure_connected())
+            transfer_data = {**transfer_data, **resolved}
+        async with amqp_pool.channel() as channel:
+            message_body = codec.dumps(transfer_data)
             message = Message(
                 message_body,
                 correlation_id=correlation_id,
-                reply_to=callback_queue.name,
+                reply_to=amqp_pool.replies.queue_name,
                 delivery_mode=DeliveryMode.PERSISTENT,
+                headers={**deadline.propagation_headers(), **tracing.propagation_headers()},
             )
             await channel.default_exchange.publish(
                 message,
                 routing_key=settings.transfer_queue_name
             )
 
-            await asyncio.sleep(3)
+
+async def _transfer_funds(transfer_data: dict, recipient: Optional[Awaitable[dict]] = None) -> str:
+    with tracing.tracer.start_span("transfer") as span:
+        try:
+            correlation_id = str(uuid.uuid4())
+            span.set_attribute("transfer.correlation_id", correlation_id)
+            reply = amqp_pool.replies.expect(correlation_id)
             try:
-                response_message = await asyncio.wait_for(callback_queue.get(), timeout=3)
-                response_body = response_message.body.decode()
-                response_data = json.loads(response_body)
-                if not response_data.get("result"):
+                await _publish_transfer(transfer_data, correlation_id, recipient)
+                reply_timeout = settings.transfer_reply_timeout
+                left = deadline.remaining()
+                if left is not None:
+                    reply_timeout = max(min(reply_timeout, left), 0)
+                with tracing.tracer.start_span("amqp reply wait", kind="consumer"):
+                    response_body = await asyncio.wait_for(reply, timeout=reply_timeout)
+                status = _transfer_status(codec.loads(response_body))
+                span.set_attribute("transfer.status", status)
+                if status == "failed":
                     return f"Transfer failed"
                 return f"Transfer successful"
-            except (asyncio.TimeoutError, aio_pika.exceptions.QueueEmpty):
+            except asyncio.TimeoutError:
+                span.set_attribute("transfer.status", "processing")
                 return "Transfer is being processed"
+            finally:
+                amqp_pool.replies.discard(correlation_id)
+        except Exception as exc:
+            raise Exception(f"Transfer failed: {exc}")
+
+
+def _store_transfer_result(correlation_id: str, response_body: bytes) -> None:
+    result = transfer_results.get(correlation_id)
+    if result is None:
+        return
+    try:
+        result["status"] = _transfer_status(codec.loads(response_body))
+    except ValueError:
+        result["status"] = "failed"
+
+
+async def _submit_transfer(transfer_data: dict, recipient: Optional[Awaitable[dict]] = None) -> str:
+    correlation_id = str(uuid.uuid4())
+    transfer_results.set(correlation_id, {"client_id": transfer_data["from_clientId"], "status": "processing"})
+    amqp_pool.replies.track(correlation_id, partial(_store_transfer_result, correlation_id))
+    try:
+        await _publish_transfer(transfer_data, correlation_id, recipient)
     except Exception as exc:
+        amqp_pool.replies.untrack(correlation_id)
+        transfer_results.pop(correlation_id)
         raise Exception(f"Transfer failed: {exc}")
+    return correlation_id
 
 
-async def get_client_accounts(client_id: str, role: str) -> List[AccountDTO]:
-    response = await http_request_with_retry(
+async def _send_transfer(transfer_data: dict, wait: bool, recipient: Optional[Awaitable[dict]] = None) -> str:
+    if wait:
+        return await _transfer_funds(transfer_data, recipient)
+    return await _submit_transfer(transfer_data, recipient)
+
+
+def get_transfer_status(transfer_id: str, client_id: str) -> Optional[TransferStatusDTO]:
+    result = transfer_results.get(transfer_id)
+    if result is None or result["client_id"] != client_id:
+        return None
+    return TransferStatusDTO(id=UUID(transfer_id), status=result["status"])
+
+
+async def _list_client_accounts(client_id: str, role: str) -> UpstreamResponse:
+    return await http_request_with_retry(
         method="get",
         url=f"{settings.account_service_url}/accounts",
         params={"clientId": client_id, "role": role}
     )
-    data = response.json()
+
+
+async def get_client_accounts(client_id: str, role: str) -> List[AccountDTO]:
+    data = (await _list_client_accounts(client_id, role)).json()
     return [AccountDTO(**item) for item in data]
 
 
+async def get_client_accounts_raw(client_id: str, role: str) -> bytes:
+    return (await _list_client_accounts(client_id, role)).content
+
+
 async def create_debit_account(currency_type: str, client_id: str, role: str) -> None:
     await http_request_with_retry(
         method="post",
@@ -84,16 +164,48 @@ async def withdraw_account(account_id: str, client_id: str, amount: float, role:
     )
 
 
-async def get_transactions(account_id: str, client_id: str, role: str) -> List[TransactionDTO]:
+def _transactions_params(client_id: str, role: str, cursor: Optional[str], limit: Optional[int]) -> dict:
+    params = {"clientId": client_id, "role": role}
+    if cursor is not None:
+        params["cursor"] = cursor
+    if limit is not None:
+        params["limit"] = limit
+    return params
+
+
+async def get_transactions(account_id: str, client_id: str, role: str, cursor: Optional[str] = None,
+                           limit: Optional[int] = None) -> List[TransactionDTO]:
     response = await http_request_with_retry(
         method="post",
         url=f"{settings.account_service_url}/accounts/{account_id}/transactions",
-        params={"clientId": client_id, "role": role}
+        params=_transactions_params(client_id, role, cursor, limit)
     )
     data = response.json()
     return [TransactionDTO(**item) for item in data]
 
 
+async def stream_transactions(account_id: str, client_id: str, role: str, cursor: Optional[str] = None,
+                              limit: Optional[int] = None) -> AsyncIterator[TransactionDTO]:
+    """
+    Открывает потоковый ответ сервиса счетов и возвращает итератор транзакций,
+    которые разбираются по мере поступления. Ошибки сервиса бросаются сразу,
+    до начала итерации.
+    """
+    stack = AsyncExitStack()
+    response = await stack.enter_async_context(http_stream_with_retry(
+        method="post",
+        url=f"{settings.account_service_url}/accounts/{account_id}/transactions",
+        params=_transactions_params(client_id, role, cursor, limit)
+    ))
+
+    async def transactions() -> AsyncIterator[TransactionDTO]:
+        async with stack:
+            async for item in iter_json_array(response.aiter_bytes()):
+                yield TransactionDTO(**item)
+
+    return transactions()
+
+
 async def deposit_account(account_id: str, client_id: str, amount: float, role: str) -> None:
     await http_request_with_retry(
         method="post",
@@ -119,7 +231,7 @@ async def set_primary_account(account_id: str, client_id: str, role: str) -> Non
 
 
 async def transfer_funds_by_account(from_account_id: str, to_account_id: str, client_id: str, amount: float,
-                                    role: str) -> str:
+                                    role: str, wait: bool = True) -> str:
     transfer_data = {
         "from_account": from_account_id,
         "to_account": to_account_id,
@@ -127,11 +239,11 @@ async def transfer_funds_by_account(from_account_id: str, to_account_id: str, cl
         "amount": amount,
         "role": role
     }
-    return await _transfer_funds(transfer_data)
+    return await _send_transfer(transfer_data, wait)
 
 
 async def transfer_funds_by_client(from_account_id: str, to_client_id: str, client_id: str, amount: float,
-                                   role: str) -> str:
+                                   role: str, wait: bool = True) -> str:
     transfer_data = {
         "from_account": from_account_id,
         "to_clientId": to_client_id,
@@ -139,11 +251,11 @@ async def transfer_funds_by_client(from_account_id: str, to_client_id: str, clie
         "amount": amount,
         "role": role
     }
-    return await _transfer_funds(transfer_data)
+    return await _send_transfer(transfer_data, wait)
 
 
 async def transfer_funds_by_account_number(from_account_id: str, to_account_number: str, client_id: str, amount: float,
-                                           role: str) -> str:
+                                           role: str, wait: bool = True) -> str:
     transfer_data = {
         "from_account": from_account_id,
         "to_account_number": to_account_number,
@@ -151,4 +263,26 @@ async def transfer_funds_by_account_number(from_account_id: str, to_account_numb
         "amount": amount,
         "role": role
     }
-    return await _transfer_funds(transfer_data)
+    return await _send_transfer(transfer_data, wait)
+
+
+async def _recipient_by_phone(phone_number: str) -> dict:
+    return {"to_clientId": str(await get_account_id_by_phone(phone_number))}
+
+
+async def transfer_funds_by_phone(from_account_id: str, phone_number: str, client_id: str, amount: float,
+                                  role: str, wait: bool = True) -> str:
+    transfer_data = {
+        "from_account": from_account_id,
+        "from_clientId": client_id,
+        "amount": amount,
+        "role": role
+    }
+    recipient = asyncio.ensure_future(_recipient_by_phone(phone_number))
+    try:
+        return await _send_transfer(transfer_data, wait, recipient)
+    finally:
+        if not recipient.done():
+            recipient.cancel()
+        elif not recipient.cancelled():
+            recipient.exception()
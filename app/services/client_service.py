@@ -1,6 +1,26 @@
+from typing import Optional
+
+import httpx
+
 from app.core.config import settings
 from app.models.schemas import LoginReq, RegisterReq, JwtToken, ProfileResp
+from app.utils import tracing
+from app.utils.http_errors import SyntheticStatusError
 from app.utils.http_retry import http_request_with_retry
+from app.utils.ttl_cache import TTLCache
+
+
+class _UnknownPhone:
+    def __init__(self, status_code: int, detail: str):
+        self.status_code = status_code
+        self.detail = detail
+
+    def error(self, url: str) -> httpx.HTTPStatusError:
+        return SyntheticStatusError("GET", url, self.status_code, self.detail,
+                                    f"User lookup failed with {self.status_code}")
+
+
+phone_lookup_cache = TTLCache(maxsize=settings.phone_cache_size, ttl=settings.phone_cache_ttl)
 
 
 async def login_client(data: LoginReq) -> JwtToken:
@@ -18,6 +38,7 @@ async def register_client(data: RegisterReq) -> JwtToken:
         url=f"{settings.user_service_url}/register",
         json=data.dict()
     )
+    invalidate_phone_lookup(phone_number=data.phone_number)
     return JwtToken(**response.json())
 
 
@@ -29,10 +50,42 @@ async def get_client_profile(client_id: str) -> ProfileResp:
     return ProfileResp(**response.json())
 
 
-async def get_account_id_by_phone(phone_number: str) -> None:
-    response = await http_request_with_retry(
-        method="get",
-        url=f"{settings.user_service_url}/find",
-        params={"phone_number": phone_number}
-    )
-    return response.json()['id']
+async def get_account_id_by_phone(phone_number: str) -> str:
+    """
+    Ищет ID пользователя по номеру телефона. Найденные и ненайденные номера
+    кэшируются; для ненайденных повторно бросается та же ошибка сервиса.
+    """
+    with tracing.tracer.start_span("get_account_id_by_phone") as span:
+        url = f"{settings.user_service_url}/find"
+        cached = phone_lookup_cache.get(phone_number)
+        span.set_attribute("cache.hit", cached is not None)
+        if isinstance(cached, _UnknownPhone):
+            raise cached.error(url)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await http_request_with_retry(
+                method="get",
+                url=url,
+                params={"phone_number": phone_number}
+            )
+        except httpx.HTTPStatusError as exc:
+            if exc.response.status_code == 404:
+                phone_lookup_cache.set(
+                    phone_number,
+                    _UnknownPhone(exc.response.status_code, exc.response.text),
+                    ttl=settings.phone_cache_negative_ttl
+                )
+            raise
+        user_id = response.json()['id']
+        phone_lookup_cache.set(phone_number, user_id)
+        return user_id
+
+
+def invalidate_phone_lookup(phone_number: Optional[str] = None, user_id: Optional[str] = None) -> None:
+    if phone_number is not None:
+        phone_lookup_cache.pop(phone_number)
+    if user_id is not None:
+        # Смена статуса может как скрыть пользователя, так и сделать ранее ненайденный номер доступным
+        phone_lookup_cache.remove_if(lambda _, value: value == user_id or isinstance(value, _UnknownPhone))
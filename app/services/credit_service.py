@@ -1,35 +1,77 @@
-from typing import List
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set
 from uuid import UUID
 
 from app.core.config import settings
 from app.models.schemas import CreditTariffDTO, CreditDTO, CreateCreditTariffAPIDTO, EditCreditTariffDTO, \
-    TakeCreditAPIDTO, UuidDTO, LimitDTO, CreditPaymentDTO, ShortCreditTariffDTO, MessageDTO
+    TakeCreditAPIDTO, UuidDTO, LimitDTO, CreditPaymentDTO, ShortCreditTariffDTO, MessageDTO, ExpandedCreditDTO
 from app.utils.http_retry import http_request_with_retry
+from app.utils.response_cache import response_cache
 
 
-async def get_tariffs() -> List[ShortCreditTariffDTO]:
+TARIFFS_CACHE_PREFIX = "tariffs:"
+
+
+async def _fetch_tariffs() -> list:
     response = await http_request_with_retry(
         method="get",
         url=f"{settings.credit_service_url}/tariffs"
     )
-    return [ShortCreditTariffDTO(**tariff) for tariff in response.json()['tariffs']]
+    return response.json()['tariffs']
 
 
-async def get_tariff(tariff_id: UUID) -> CreditTariffDTO:
+async def _fetch_tariff(tariff_id: UUID) -> list:
     response = await http_request_with_retry(
         method="get",
         url=f"{settings.credit_service_url}/tariffs/{tariff_id}"
     )
-    return [CreditTariffDTO(**tariff) for tariff in response.json()['tariff']][0]
+    return response.json()['tariff']
+
+
+async def get_tariffs() -> List[ShortCreditTariffDTO]:
+    tariffs = await response_cache.get_or_fetch(
+        f"{TARIFFS_CACHE_PREFIX}list",
+        _fetch_tariffs,
+        ttl=settings.tariffs_cache_ttl
+    )
+    return [ShortCreditTariffDTO(**tariff) for tariff in tariffs]
+
+
+async def get_tariff(tariff_id: UUID) -> CreditTariffDTO:
+    tariff = await response_cache.get_or_fetch(
+        f"{TARIFFS_CACHE_PREFIX}{tariff_id}",
+        lambda: _fetch_tariff(tariff_id),
+        ttl=settings.tariffs_cache_ttl
+    )
+    return [CreditTariffDTO(**item) for item in tariff][0]
+
+
+async def get_tariffs_by_ids(tariff_ids: Iterable[UUID]) -> Dict[UUID, CreditTariffDTO]:
+    """
+    Загружает несколько тарифов: закэшированные читаются одним запросом к кэшу,
+    недостающие запрашиваются у сервиса кредитов параллельно.
+    """
+    tariff_ids = list(dict.fromkeys(tariff_ids))
+    tariffs = await response_cache.get_many_or_fetch(
+        [f"{TARIFFS_CACHE_PREFIX}{tariff_id}" for tariff_id in tariff_ids],
+        lambda key: _fetch_tariff(UUID(key[len(TARIFFS_CACHE_PREFIX):])),
+        ttl=settings.tariffs_cache_ttl
+    )
+    return {tariff_id: CreditTariffDTO(**tariff[0]) for tariff_id, tariff in zip(tariff_ids, tariffs)}
+
+
+async def invalidate_tariffs_cache(tariff_id: Optional[UUID] = None) -> None:
+    if tariff_id is None:
+        await response_cache.invalidate(f"{TARIFFS_CACHE_PREFIX}list")
+    else:
+        await response_cache.invalidate(f"{TARIFFS_CACHE_PREFIX}list", f"{TARIFFS_CACHE_PREFIX}{tariff_id}")
 
 
 async def add_tariff(data: CreateCreditTariffAPIDTO) -> UuidDTO:
-    data = data.dict()
-    data['employee_id'] = str(data['employee_id'])
     response = await http_request_with_retry(
         method="post",
         url=f"{settings.credit_service_url}/tariffs",
-        json=data
+        json=data.dict()
     )
     return UuidDTO(id=UUID(response.json()['tariff_id']))
 
@@ -65,15 +107,10 @@ async def get_credit_limits(user_id: UUID) -> LimitDTO:
 
 
 async def take_credit(data: TakeCreditAPIDTO) -> MessageDTO:
-    data = data.dict()
-    data['user_id'] = str(data['user_id'])
-    data['tariff_id'] = str(data['tariff_id'])
-    data['write_off_account_id'] = str(data['write_off_account_id'])
-
     response = await http_request_with_retry(
         method="post",
         url=f"{settings.credit_service_url}/credit",
-        json=data
+        json=data.dict()
     )
 
     response_data = response.json()
@@ -106,3 +143,29 @@ async def get_credit_payment_history(credit_id: UUID) -> List[CreditPaymentDTO]:
         url=f"{settings.credit_service_url}/get-payment-history/{credit_id}"
     )
     return [CreditPaymentDTO(**payment) for payment in response.json()['credit_payments']]
+
+
+async def get_credits_expanded(user_id: UUID, expand: Set[str]) -> List[ExpandedCreditDTO]:
+    credits = await get_credits(user_id)
+
+    async def no_tariffs() -> Dict[UUID, CreditTariffDTO]:
+        return {}
+
+    async def no_histories() -> list:
+        return []
+
+    tariffs_call = get_tariffs_by_ids(credit.tariff_id for credit in credits) if "tariff" in expand else no_tariffs()
+    histories_call = asyncio.gather(*[
+        get_credit_payment_history(credit.id) for credit in credits
+    ]) if "history" in expand else no_histories()
+    tariffs, histories = await asyncio.gather(tariffs_call, histories_call)
+
+    expanded = []
+    for index, credit in enumerate(credits):
+        item = ExpandedCreditDTO(**credit.model_dump())
+        if "tariff" in expand:
+            item.tariff = tariffs[credit.tariff_id]
+        if "history" in expand:
+            item.history = histories[index]
+        expanded.append(item)
+    return expanded
@@ -1,42 +1,51 @@
 from typing import List
 from app.core.config import settings
 from app.models.schemas import CreateUserReq, UserDTO
-from app.utils.http_retry import http_request_with_retry
+from app.services.client_service import invalidate_phone_lookup
+from app.utils.http_retry import UpstreamResponse, http_request_with_retry
 
 
-async def get_employees() -> List[UserDTO]:
-    response = await http_request_with_retry(
+async def _list_users(path: str) -> UpstreamResponse:
+    return await http_request_with_retry(
         method="get",
-        url=f"{settings.user_service_url}/employee"
+        url=f"{settings.user_service_url}/employee{path}"
     )
-    data = response.json()
+
+
+async def get_employees() -> List[UserDTO]:
+    data = (await _list_users("")).json()
     return [UserDTO(**item) for item in data]
 
 
+async def get_employees_raw() -> bytes:
+    return (await _list_users("")).content
+
+
 async def get_users() -> List[UserDTO]:
-    response = await http_request_with_retry(
-        method="get",
-        url=f"{settings.user_service_url}/employee/users"
-    )
-    data = response.json()
+    data = (await _list_users("/users")).json()
     return [UserDTO(**item) for item in data]
 
 
+async def get_users_raw() -> bytes:
+    return (await _list_users("/users")).content
+
+
 async def get_clients() -> List[UserDTO]:
-    response = await http_request_with_retry(
-        method="get",
-        url=f"{settings.user_service_url}/employee/clients"
-    )
-    data = response.json()
+    data = (await _list_users("/clients")).json()
     return [UserDTO(**item) for item in data]
 
 
+async def get_clients_raw() -> bytes:
+    return (await _list_users("/clients")).content
+
+
 async def set_user_active(user_id: str, is_active: bool) -> None:
     await http_request_with_retry(
         method="post",
         url=f"{settings.user_service_url}/employee/user/active/{user_id}",
         params={"is_active": is_active}
     )
+    invalidate_phone_lookup(user_id=user_id)
 
 
 async def create_user(data: CreateUserReq) -> None:
@@ -45,3 +54,4 @@ async def create_user(data: CreateUserReq) -> None:
         url=f"{settings.user_service_url}/employee/create",
         json=data.dict()
     )
+    invalidate_phone_lookup(phone_number=data.phone_number)
@@ -2,15 +2,23 @@ from typing import List
 from app.core.config import settings
 from app.models.schemas import DoExchangeResp, DoExchangeReq, UserDTO
 from app.utils.http_retry import http_request_with_retry
+from app.utils.response_cache import response_cache
 
 
-async def get_currencies() -> List[UserDTO]:
+async def _fetch_currencies() -> list:
     response = await http_request_with_retry(
         method="get",
         url=f"{settings.exchange_service_url}/currencies"
     )
-    data = response.json()
-    return data
+    return response.json()
+
+
+async def get_currencies() -> List[UserDTO]:
+    return await response_cache.get_or_fetch(
+        "currencies:list",
+        _fetch_currencies,
+        ttl=settings.currencies_cache_ttl
+    )
 
 
 async def do_exchange(data: DoExchangeReq) -> DoExchangeResp:
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import AsyncIterator, Callable, Dict, Optional
+
+import aio_pika
+from aio_pika.abc import AbstractChannel, AbstractIncomingMessage, AbstractRobustConnection
+from aio_pika.pool import Pool
+
+from app.core.config import settings
+from app.utils.ttl_cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+
+class ReplyDispatcher:
+    """
+    Постоянно слушает одну очередь ответов и завершает future ожидающего
+    запроса по correlation_id сразу, как только пришёл ответ. Для запросов,
+    которые никто не ждёт, вызывает зарегистрированный обработчик.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._tracked = TTLCache(maxsize=settings.transfer_result_store_size, ttl=settings.transfer_result_ttl)
+        self._channel: Optional[AbstractChannel] = None
+        self.queue_name: Optional[str] = None
+
+    async def start(self, connection: AbstractRobustConnection) -> None:
+        channel = await connection.channel()
+        try:
+            queue = await channel.declare_queue(exclusive=True)
+            await queue.consume(self._on_message, no_ack=True)
+        except BaseException:
+            await channel.close()
+            raise
+        self._channel, self.queue_name = channel, queue.name
+
+    def expect(self, correlation_id: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._pending[correlation_id] = future
+        return future
+
+    def discard(self, correlation_id: str) -> None:
+        self._pending.pop(correlation_id, None)
+
+    def track(self, correlation_id: str, callback: Callable[[bytes], None]) -> None:
+        self._tracked.set(correlation_id, callback)
+
+    def untrack(self, correlation_id: str) -> None:
+        self._tracked.pop(correlation_id)
+
+    async def _on_message(self, message: AbstractIncomingMessage) -> None:
+        future = self._pending.pop(message.correlation_id, None)
+        if future is not None and not future.done():
+            future.set_result(message.body)
+            return
+
+        callback = self._tracked.pop(message.correlation_id)
+        if callback is not None:
+            callback(message.body)
+
+    async def close(self) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.cancel()
+        self._pending.clear()
+        self._tracked.clear()
+        if self._channel is not None:
+            await self._channel.close()
+            self._channel = None
+
+
+class AmqpChannelPool:
+    """
+    Одно robust-соединение с RabbitMQ на всё время работы приложения
+    и ограниченный пул каналов поверх него. Очередь переводов и очередь
+    ответов объявляются один раз при подключении.
+    """
+
+    def __init__(self):
+        self._connection: Optional[AbstractRobustConnection] = None
+        self._channels: Optional[Pool] = None
+        self._lock = asyncio.Lock()
+        self.replies = ReplyDispatcher()
+
+    async def _create_channel(self, connection: AbstractRobustConnection) -> AbstractChannel:
+        return await connection.channel()
+
+    async def _connect(self) -> None:
+        # Состояние пула публикуется только после полной настройки, иначе
+        # ensure_connected больше не повторил бы подключение
+        connection = await aio_pika.connect_robust(
+            host=settings.rabbitmq_account_host,
+            port=int(settings.rabbitmq_account_port),
+            login=settings.rabbitmq_account_login,
+            password=settings.rabbitmq_account_password
+        )
+        channels = Pool(partial(self._create_channel, connection), max_size=settings.amqp_channel_pool_size)
+        try:
+            async with channels.acquire() as channel:
+                await channel.declare_queue(settings.transfer_queue_name, durable=True)
+            await self.replies.start(connection)
+        except BaseException:
+            await channels.close()
+            await connection.close()
+            raise
+        self._connection, self._channels = connection, channels
+
+    async def ensure_connected(self) -> None:
+        if self._channels is not None:
+            return
+        async with self._lock:
+            if self._channels is None:
+                await self._connect()
+
+    async def start(self) -> None:
+        try:
+            await self.ensure_connected()
+        except (aio_pika.exceptions.AMQPException, OSError) as exc:
+            logger.warning("RabbitMQ is unavailable on startup, will reconnect on demand: %s", exc)
+
+    @asynccontextmanager
+    async def channel(self) -> AsyncIterator[AbstractChannel]:
+        await self.ensure_connected()
+        async with self._channels.acquire() as channel:
+            yield channel
+
+    async def close(self) -> None:
+        channels, connection = self._channels, self._connection
+        self._channels, self._connection = None, None
+        await self.replies.close()
+        if channels is not None:
+            await channels.close()
+        if connection is not None:
+            await connection.close()
+
+
+amqp_pool = AmqpChannelPool()
@@ -0,0 +1,144 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Tuple
+
+import httpx
+from prometheus_client import Gauge
+
+from app.core.config import settings
+from app.utils.http_errors import SyntheticStatusError
+
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+circuit_breaker_state = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state per downstream service (0 - closed, 1 - half-open, 2 - open)",
+    ["service"],
+    multiprocess_mode="livemax"
+)
+
+
+class CircuitOpenError(SyntheticStatusError):
+    """
+    Бросается без обращения к сервису, пока его предохранитель разомкнут.
+    Роутеры отвечают на неё клиенту 503.
+    """
+
+    def __init__(self, service: str, method: str, url: str):
+        super().__init__(
+            method, url, 503,
+            f"Service {service} is temporarily unavailable",
+            f"Circuit breaker for {service} is open"
+        )
+        self.service = service
+
+
+class CircuitBreaker:
+    """
+    Предохранитель одного downstream-сервиса.
+    Размыкается, когда в скользящем окне последних вызовов доля ошибок
+    или медленных вызовов превышает порог; через circuit_open_seconds
+    пропускает несколько пробных вызовов (half-open) и по их итогам
+    замыкается или снова размыкается.
+    """
+
+    def __init__(self, service: str):
+        self.service = service
+        self.state = CLOSED
+        self._calls: Deque[Tuple[bool, bool]] = deque(maxlen=settings.circuit_window_size)
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        self._set_state(CLOSED)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        circuit_breaker_state.labels(service=self.service).set(STATE_VALUES[state])
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+        self._set_state(OPEN)
+
+    def _close(self) -> None:
+        self._calls.clear()
+        self._set_state(CLOSED)
+
+    def _acquire(self, method: str, url: str) -> None:
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < settings.circuit_open_seconds:
+                raise CircuitOpenError(self.service, method, url)
+            self._half_open_in_flight = 0
+            self._half_open_successes = 0
+            self._set_state(HALF_OPEN)
+
+        if self.state == HALF_OPEN:
+            if self._half_open_in_flight >= settings.circuit_half_open_calls:
+                raise CircuitOpenError(self.service, method, url)
+            self._half_open_in_flight += 1
+
+    def _release(self) -> None:
+        if self.state == HALF_OPEN:
+            self._half_open_in_flight -= 1
+
+    def _record(self, success: bool, started_at: float) -> None:
+        slow = time.monotonic() - started_at >= settings.circuit_slow_call_seconds
+
+        if self.state == HALF_OPEN:
+            if not success or slow:
+                self._open()
+                return
+            self._half_open_successes += 1
+            if self._half_open_successes >= settings.circuit_half_open_calls:
+                self._close()
+            return
+
+        if self.state != CLOSED:
+            return
+
+        self._calls.append((success, slow))
+        if len(self._calls) < settings.circuit_minimum_calls:
+            return
+        failure_rate = sum(1 for ok, _ in self._calls if not ok) / len(self._calls)
+        slow_rate = sum(1 for _, is_slow in self._calls if is_slow) / len(self._calls)
+        if failure_rate >= settings.circuit_failure_rate_threshold or slow_rate >= settings.circuit_slow_call_rate_threshold:
+            self._open()
+
+    @contextmanager
+    def call(self, method: str, url: str) -> Iterator[None]:
+        self._acquire(method, url)
+        started_at = time.monotonic()
+        try:
+            yield
+        except httpx.HTTPStatusError as exc:
+            self._record(exc.response.status_code < 500, started_at)
+            raise
+        except httpx.TransportError:
+            self._record(False, started_at)
+            raise
+        except BaseException:
+            self._release()
+            raise
+        else:
+            self._record(True, started_at)
+
+
+class CircuitBreakerRegistry:
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, service: str) -> CircuitBreaker:
+        breaker = self._breakers.get(service)
+        if breaker is None:
+            breaker = CircuitBreaker(service)
+            self._breakers[service] = breaker
+        return breaker
+
+
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,45 @@
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Union
+from uuid import UUID
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Кодирует объект в JSON через orjson, а без него - через стандартный json.
+    UUID и datetime поддерживаются без ручного приведения к строке.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class CodecJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,168 @@
+import contextvars
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Union
+
+import httpx
+from tenacity import RetryCallState
+from tenacity.stop import stop_base
+
+from app.core.config import settings
+from app.utils.http_errors import SyntheticStatusError
+
+
+DEADLINE_HEADER = "X-Request-Timeout"
+
+EXPIRY_TOLERANCE = 0.01
+
+
+
+class SharedDeadline:
+    """
+    Крайний срок общего вызова, который ждут несколько запросов: самый поздний
+    из сроков ожидающих. Каждый присоединившийся запрос продлевает его.
+    """
+
+    def __init__(self, source: "DeadlineValue"):
+        self._sources: List["DeadlineValue"] = [source]
+
+    def join(self, source: "DeadlineValue") -> None:
+        self._sources.append(source)
+
+    def resolve(self) -> Optional[float]:
+        latest = None
+        for source in self._sources:
+            value = source.resolve() if isinstance(source, SharedDeadline) else source
+            if value is None:
+                return None
+            latest = value if latest is None else max(latest, value)
+        return latest
+
+
+DeadlineValue = Union[float, SharedDeadline, None]
+
+_deadline: ContextVar[DeadlineValue] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceededError(SyntheticStatusError):
+    """
+    Бросается вместо обращения к сервису, когда бюджет времени запроса исчерпан.
+    Роутеры отвечают на неё клиенту 504.
+    """
+
+    def __init__(self, method: str, url: str):
+        super().__init__(method, url, 504, "Request deadline exceeded", f"Deadline exceeded before calling {url}")
+
+
+def current() -> DeadlineValue:
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    deadline = _deadline.get()
+    if isinstance(deadline, SharedDeadline):
+        deadline = deadline.resolve()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def expired() -> bool:
+    """
+    Бюджет исчерпан. Небольшой допуск нужен, чтобы таймаут, урезанный
+    до остатка бюджета, считался его исчерпанием.
+    """
+    left = remaining()
+    return left is not None and left <= EXPIRY_TOLERANCE
+
+
+def context_with(deadline: DeadlineValue) -> contextvars.Context:
+    """
+    Копия текущего контекста с другим крайним сроком - для общих и фоновых задач.
+    """
+    context = contextvars.copy_context()
+    context.run(_deadline.set, deadline)
+    return context
+
+
+def hop_timeout(timeout: httpx.Timeout, method: str, url: str) -> httpx.Timeout:
+    """
+    Урезает таймауты очередного вызова до оставшегося бюджета запроса.
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceededError(method, url)
+
+    def trim(value: Optional[float]) -> float:
+        return left if value is None else min(value, left)
+
+    return httpx.Timeout(
+        connect=trim(timeout.connect),
+        read=trim(timeout.read),
+        write=trim(timeout.write),
+        pool=trim(timeout.pool)
+    )
+
+
+def propagation_headers() -> Dict[str, str]:
+    left = remaining()
+    if left is None:
+        return {}
+    return {DEADLINE_HEADER: f"{max(left, 0):.3f}"}
+
+
+class stop_at_deadline(stop_base):
+    """
+    Останавливает повторы, если после ожидания на следующую попытку не останется времени.
+    """
+
+    def __call__(self, retry_state: RetryCallState) -> bool:
+        left = remaining()
+        return left is not None and retry_state.upcoming_sleep >= left
+
+
+def _route_deadline(path: str) -> float:
+    matched = ""
+    for prefix in settings.route_deadlines:
+        if path.startswith(prefix) and len(prefix) > len(matched):
+            matched = prefix
+    return settings.route_deadlines[matched] if matched else settings.request_deadline_seconds
+
+
+def _header_deadline(headers: list) -> Optional[float]:
+    for name, value in headers:
+        if name.decode("latin-1").lower() == DEADLINE_HEADER.lower():
+            try:
+                timeout = float(value)
+            except ValueError:
+                return None
+            return timeout if timeout > 0 else None
+    return None
+
+
+class DeadlineMiddleware:
+    """
+    Задаёт бюджет времени входящего запроса: из заголовка X-Request-Timeout
+    (в секундах) или по умолчанию для маршрута, но не больше последнего.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timeout = _route_deadline(scope["path"])
+        header_timeout = _header_deadline(scope["headers"])
+        if header_timeout is not None:
+            timeout = min(timeout, header_timeout)
+
+        token = _deadline.set(time.monotonic() + timeout)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
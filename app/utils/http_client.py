@@ -0,0 +1,75 @@
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+
+class HttpClientRegistry:
+    """
+    Хранит по одному пулу соединений на каждый downstream-сервис.
+    Клиенты живут всё время работы приложения: открываются в lifespan
+    и закрываются при его завершении.
+    """
+
+    def __init__(self):
+        self._services: Dict[str, Tuple[str, float]] = {
+            "user": (settings.user_service_url, settings.user_service_timeout),
+            "account": (settings.account_service_url, settings.account_service_timeout),
+            "credit": (settings.credit_service_url, settings.credit_service_timeout),
+            "exchange": (settings.exchange_service_url, settings.exchange_service_timeout),
+        }
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._default_client: Optional[httpx.AsyncClient] = None
+
+    def _create_client(self, base_url: str = "", timeout: float = 5.0) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            # Без http1=False httpx договаривается об HTTP/2 только через TLS ALPN, а внутренние
+            # сервисы ходят по http://, поэтому HTTP/2 включается с prior knowledge (h2c)
+            http1=not settings.http2_enabled,
+            http2=settings.http2_enabled,
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry,
+            ),
+        )
+
+    def resolve_service(self, url: str) -> Optional[str]:
+        for name, (base_url, _) in self._services.items():
+            if url.startswith(base_url.rstrip("/")):
+                return name
+        return None
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        service = self.resolve_service(url)
+        if service is None:
+            if self._default_client is None:
+                self._default_client = self._create_client()
+            return self._default_client
+
+        client = self._clients.get(service)
+        if client is None or client.is_closed:
+            base_url, timeout = self._services[service]
+            client = self._create_client(base_url, timeout)
+            self._clients[service] = client
+        return client
+
+    async def start(self) -> None:
+        for service, (base_url, timeout) in self._services.items():
+            if service not in self._clients:
+                self._clients[service] = self._create_client(base_url, timeout)
+
+    async def close(self) -> None:
+        clients = list(self._clients.values())
+        if self._default_client is not None:
+            clients.append(self._default_client)
+        self._clients.clear()
+        self._default_client = None
+        for client in clients:
+            await client.aclose()
+
+
+http_clients = HttpClientRegistry()
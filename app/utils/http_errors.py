@@ -0,0 +1,14 @@
+import httpx
+
+
+class SyntheticStatusError(httpx.HTTPStatusError):
+    """
+    Ошибка с кодом ответа, сформированная шлюзом без обращения к сервису.
+    Наследуется от HTTPStatusError, поэтому роутеры переводят её в ответ
+    клиенту так же, как настоящие ошибки downstream-сервисов.
+    """
+
+    def __init__(self, method: str, url: str, status_code: int, detail: str, message: str):
+        request = httpx.Request(method.upper(), url)
+        response = httpx.Response(status_code, text=detail, request=request)
+        super().__init__(message, request=request, response=response)
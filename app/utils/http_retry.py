@@ -1,64 +1,166 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterable, AsyncIterator, Optional, Union
+
 import httpx
-from tenacity import retry, stop_after_attempt, wait_fixed
+from tenacity import AsyncRetrying, stop_after_attempt, wait_random_exponential
 from app.core.config import settings
-from prometheus_client import Gauge, Summary
+from app.utils import codec, deadline, metrics, tracing
+from app.utils.circuit_breaker import circuit_breakers
+from app.utils.http_client import http_clients
+from app.utils.retry_policy import retry_budgets, retry_by_policy
+from app.utils.single_flight import SingleFlight
+
+
+in_flight_requests = SingleFlight()
+
+RequestContent = Optional[Union[bytes, str, AsyncIterable[bytes]]]
+
+_UNPARSED = object()
 
 
-http_requests_seconds_count = Gauge(
-    "http_server_requests_active_seconds_count",
-    "Total number of HTTP requests attempted",
-    ["method", "endpoint", "status"]
-)
+class UpstreamResponse:
+    """
+    Ответ downstream-сервиса с ленивым разбором тела: JSON декодируется
+    один раз при первом обращении к json() и переиспользуется всеми,
+    кто получил этот ответ.
+    """
 
-http_requests_errors_total = Gauge(
-    "http_request_errors_total",
-    "Total number of failed HTTP requests",
-    ["method", "endpoint", "error_type"]
-)
+    def __init__(self, response: httpx.Response):
+        self._response = response
+        self._json: Any = _UNPARSED
 
-http_requests_active_seconds = Summary(
-    "http_request_duration_seconds",
-    "Time spent on HTTP requests",
-    ["method", "endpoint"]
-)
+    def json(self) -> Any:
+        if self._json is _UNPARSED:
+            self._json = codec.loads(self._response.content)
+        return self._json
 
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._response, name)
 
-@retry(
-    stop=stop_after_attempt(settings.retries),
-    wait=wait_fixed(settings.wait_seconds)
-)
-async def http_request_with_retry(method: str, url: str, json: dict = None, params: dict = None) -> httpx.Response:
-    labels = {"method": method.lower(), "endpoint": url}
 
-    with http_requests_active_seconds.labels(**labels).time():
+async def _send_request(method: str, url: str, service: str, json: Any = None, params: dict = None,
+                        content: RequestContent = None, headers: dict = None, stream: bool = False,
+                        attempt: int = 1) -> httpx.Response:
+    labels = metrics.request_labels(service, method, url)
+    attributes = {
+        "http.method": labels["method"],
+        "http.route": labels["route"],
+        "peer.service": service,
+        "http.retry_count": attempt - 1,
+    }
+
+    with tracing.tracer.start_span(f"{labels['method']} {labels['route']}", kind="client", attributes=attributes) as span, \
+            metrics.http_request_duration_seconds.labels(**labels).time():
+        response = None
         try:
-            async with httpx.AsyncClient() as client:
-                if method.lower() == "get":
-                    response = await client.get(url, params=params)
-                elif method.lower() == "post":
-                    response = await client.post(url, json=json, params=params)
-                else:
-                    raise ValueError(f"Unsupported HTTP method: {method}")
-
-                http_requests_seconds_count.labels(
-                    method=method.lower(),
-                    endpoint=url,
+            client = http_clients.get_client(url)
+            breaker = circuit_breakers.get(service)
+            headers = {**(headers or {}), **deadline.propagation_headers(), **tracing.propagation_headers()}
+            if json is not None:
+                content = codec.dumps(json)
+                headers["Content-Type"] = "application/json"
+            request = client.build_request(
+                method.upper(),
+                url,
+                params=params,
+                content=content,
+                headers=headers,
+                timeout=deadline.hop_timeout(client.timeout, method, url)
+            )
+            with breaker.call(method, url):
+                response = await client.send(request, stream=stream)
+                span.set_attribute("http.status_code", response.status_code)
+
+                metrics.http_requests_total.labels(
+                    **labels,
                     status=str(response.status_code)
                 ).inc()
 
+                if stream and response.is_error:
+                    await response.aread()
                 response.raise_for_status()
 
-                return response
+            return response
         except Exception as e:
-            http_requests_seconds_count.labels(
-                method=method.lower(),
-                endpoint=url,
-                status="500"
-            ).inc()
+            if stream and response is not None:
+                await response.aclose()
 
-            http_requests_errors_total.labels(
-                method=method.lower(),
-                endpoint=url,
+            # Ответ с кодом ошибки уже учтён выше со своим статусом
+            if response is None:
+                metrics.http_requests_total.labels(**labels, status="error").inc()
+
+            metrics.http_request_errors_total.labels(
+                **labels,
                 error_type=type(e).__name__
             ).inc()
+            # Таймаут, урезанный до остатка бюджета, означает исчерпанный бюджет запроса
+            if isinstance(e, httpx.TimeoutException) and deadline.expired():
+                raise deadline.DeadlineExceededError(method, url) from e
             raise
+
+
+async def _http_request_with_retry(method: str, url: str, json: Any = None, params: dict = None,
+                                   content: RequestContent = None, headers: dict = None,
+                                   stream: bool = False) -> httpx.Response:
+    service = http_clients.resolve_service(url) or "external"
+    budget = retry_budgets.get(service)
+    budget.record_request()
+
+    # Потоковое тело запроса нельзя отправить повторно
+    max_attempts = settings.retries if content is None or isinstance(content, (bytes, str)) else 1
+    retrying = AsyncRetrying(
+        stop=stop_after_attempt(max_attempts) | deadline.stop_at_deadline(),
+        wait=wait_random_exponential(multiplier=settings.retry_backoff_base, max=settings.wait_seconds),
+        retry=retry_by_policy(method, budget, max_attempts),
+        reraise=True
+    )
+    async for attempt in retrying:
+        with attempt:
+            return await _send_request(
+                method, url, service,
+                json=json, params=params, content=content, headers=headers, stream=stream,
+                attempt=attempt.retry_state.attempt_number
+            )
+
+
+async def _buffered_request(method: str, url: str, json: Any = None, params: dict = None,
+                            content: RequestContent = None, headers: dict = None) -> UpstreamResponse:
+    response = await _http_request_with_retry(
+        method, url, json=json, params=params, content=content, headers=headers
+    )
+    return UpstreamResponse(response)
+
+
+async def http_request_with_retry(method: str, url: str, json: Any = None, params: dict = None,
+                                  content: RequestContent = None, headers: dict = None) -> UpstreamResponse:
+    with metrics.phase_timer("upstream"):
+        if method.lower() != "get" or headers:
+            return await _buffered_request(method, url, json=json, params=params, content=content, headers=headers)
+
+        # Идентичность вызывающего уже входит в ключ: clientId/role передаются в params, user_id - в url
+        key = (method.lower(), url, tuple(sorted((params or {}).items())))
+        try:
+            return await in_flight_requests.do(
+                key,
+                lambda: _buffered_request(method, url, json=json, params=params)
+            )
+        except TimeoutError:
+            raise deadline.DeadlineExceededError(method, url)
+
+
+@asynccontextmanager
+async def http_stream_with_retry(method: str, url: str, json: Any = None, params: dict = None,
+                                 content: RequestContent = None,
+                                 headers: dict = None) -> AsyncIterator[httpx.Response]:
+    """
+    Открывает потоковый ответ downstream-сервиса. Повторяется только установка
+    соединения и получение заголовков; тело читается через aiter_bytes без буферизации.
+    """
+    with metrics.phase_timer("upstream"):
+        response = await _http_request_with_retry(
+            method, url, json=json, params=params, content=content, headers=headers, stream=True
+        )
+    try:
+        yield response
+    finally:
+        await response.aclose()
@@ -0,0 +1,74 @@
+import codecs
+import json
+from typing import Any, AsyncIterable, AsyncIterator
+
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+
+
+class _ArrayReader:
+    def __init__(self):
+        self.buffer = ""
+        self.started = False
+        self.finished = False
+
+    def _skip(self, pos: int, chars: str) -> int:
+        while pos < len(self.buffer) and self.buffer[pos] in chars:
+            pos += 1
+        return pos
+
+    def items(self, final: bool) -> list:
+        items = []
+        pos = self._skip(0, _WHITESPACE)
+        if not self.started:
+            if pos == len(self.buffer):
+                self.buffer = ""
+                return items
+            if self.buffer[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            self.started = True
+            pos += 1
+
+        while not self.finished:
+            pos = self._skip(pos, _WHITESPACE + ",")
+            if pos == len(self.buffer):
+                break
+            if self.buffer[pos] == "]":
+                self.finished = True
+                pos += 1
+                break
+            try:
+                item, end = _decoder.raw_decode(self.buffer, pos)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                break
+            # Число может продолжиться в следующем чанке ("1500." + "75"),
+            # поэтому элемент принимается, только если за ним уже виден разделитель
+            if not final and (end == len(self.buffer) or self.buffer[end] not in _DELIMITERS):
+                break
+            items.append(item)
+            pos = end
+
+        self.buffer = self.buffer[pos:]
+        return items
+
+
+async def iter_json_array(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """
+    Инкрементально разбирает JSON-массив из потока байтов и отдаёт элементы
+    по мере их поступления, не держа весь документ в памяти.
+    """
+    reader = _ArrayReader()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in chunks:
+        reader.buffer += decoder.decode(chunk)
+        for item in reader.items(final=False):
+            yield item
+    reader.buffer += decoder.decode(b"", final=True)
+    for item in reader.items(final=True):
+        yield item
+    if not reader.finished:
+        raise ValueError("Unexpected end of JSON array")
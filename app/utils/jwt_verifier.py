@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+import jwt
+
+from app.core.config import settings
+from app.utils.http_client import http_clients
+
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_KID_REFRESH_SECONDS = 30
+
+
+class JwtVerifier:
+    """
+    Локальная проверка подписи и срока действия JWT.
+    Ключ берётся из JWT_PUBLIC_KEY либо из JWKS-документа по JWT_JWKS_URL,
+    который периодически перечитывается. Если подходящего ключа нет,
+    verify возвращает None, и проверка уходит в сервис пользователей.
+    """
+
+    def __init__(self):
+        self._algorithms: List[str] = [alg.strip() for alg in settings.jwt_algorithms.split(",") if alg.strip()]
+        self._jwks: Dict[str, Any] = {}
+        self._jwks_checked_at: float = float("-inf")
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return settings.jwt_verification_mode == "local" and bool(settings.jwt_public_key or settings.jwt_jwks_url)
+
+    async def _refresh_jwks(self, max_age: float) -> None:
+        if time.monotonic() - self._jwks_checked_at < max_age:
+            return
+        async with self._lock:
+            if time.monotonic() - self._jwks_checked_at < max_age:
+                return
+            self._jwks_checked_at = time.monotonic()
+            try:
+                response = await http_clients.get_client(settings.jwt_jwks_url).get(settings.jwt_jwks_url)
+                response.raise_for_status()
+                jwk_set = jwt.PyJWKSet.from_dict(response.json())
+            except (httpx.HTTPError, jwt.PyJWKError, ValueError) as exc:
+                logger.warning("Failed to refresh JWKS from %s: %s", settings.jwt_jwks_url, exc)
+                return
+            self._jwks = {jwk.key_id: jwk.key for jwk in jwk_set.keys}
+
+    async def _get_key(self, kid: Optional[str]) -> Optional[Any]:
+        if not settings.jwt_jwks_url:
+            return settings.jwt_public_key or None
+
+        await self._refresh_jwks(settings.jwt_jwks_refresh_seconds)
+        if kid is not None and kid not in self._jwks:
+            await self._refresh_jwks(UNKNOWN_KID_REFRESH_SECONDS)
+
+        if kid is not None:
+            # Неизвестный kid проверяет сервис пользователей, а не статический ключ
+            return self._jwks.get(kid)
+        if len(self._jwks) == 1:
+            return next(iter(self._jwks.values()))
+        return settings.jwt_public_key or None
+
+    async def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает claims валидного токена или None, если токен нельзя проверить локально.
+        Бросает jwt.InvalidTokenError для поддельных и просроченных токенов.
+        """
+        header = jwt.get_unverified_header(token)
+        key = await self._get_key(header.get("kid"))
+        if key is None:
+            return None
+
+        claims = jwt.decode(
+            token,
+            key=key,
+            algorithms=self._algorithms,
+            options={"require": ["exp"], "verify_aud": False}
+        )
+        if "user_id" not in claims or "role" not in claims:
+            return None
+        return claims
+
+
+jwt_verifier = JwtVerifier()
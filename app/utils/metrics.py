@@ -0,0 +1,310 @@
+import asyncio
+import functools
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional, Set
+
+import httpx
+from fastapi.routing import APIRoute
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+from app.core.config import settings
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+OVERFLOW_ROUTE = "other"
+
+UNMATCHED_ROUTE = "unmatched"
+
+_WORKER_FILE = re.compile(r"_(\d+)\.db$")
+
+_ID_SEGMENT = re.compile(
+    r"^(?:\d+"
+    r"|[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}"
+    r"|[0-9a-fA-F]{24,}"
+    r"|\+?\d[\d\-]{6,})$"
+)
+
+http_requests_total = Counter(
+    "http_requests_total",
+    "Total number of HTTP requests to downstream services",
+    ["service", "method", "route", "status"]
+)
+
+http_request_errors_total = Counter(
+    "http_request_errors_total",
+    "Total number of failed HTTP requests to downstream services",
+    ["service", "method", "route", "error_type"]
+)
+
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "Time spent on HTTP requests to downstream services",
+    ["service", "method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+
+http_server_request_duration_seconds = Histogram(
+    "http_server_request_duration_seconds",
+    "Time spent handling inbound HTTP requests",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+
+http_server_requests_in_flight = Gauge(
+    "http_server_requests_in_flight",
+    "Number of inbound HTTP requests being handled",
+    ["method"],
+    multiprocess_mode="livesum"
+)
+
+http_server_response_size_bytes = Histogram(
+    "http_server_response_size_bytes",
+    "Size of inbound HTTP response bodies",
+    ["method", "route"],
+    buckets=SIZE_BUCKETS
+)
+
+http_server_phase_duration_seconds = Histogram(
+    "http_server_phase_duration_seconds",
+    "Time spent in each phase of inbound HTTP request handling",
+    ["route", "phase"],
+    buckets=LATENCY_BUCKETS
+)
+
+
+
+class _RequestTimings:
+    __slots__ = ("phases", "endpoint_done")
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.endpoint_done: Optional[float] = None
+
+
+_timings: ContextVar[Optional[_RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+class RouteRegistry:
+    """
+    Ограничивает число различных шаблонов маршрутов на сервис. Если
+    сервис выдаёт больше шаблонов, чем разрешено, новые попадают в
+    общую метку "other" и не раздувают реестр метрик.
+    """
+
+    def __init__(self, max_routes: int):
+        self._max_routes = max_routes
+        self._routes: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def admit(self, service: str, route: str) -> str:
+        known = self._routes.get(service)
+        if known is not None and route in known:
+            return route
+        with self._lock:
+            known = self._routes.setdefault(service, set())
+            if route in known:
+                return route
+            if len(known) >= self._max_routes:
+                return OVERFLOW_ROUTE
+            known.add(route)
+            return route
+
+
+def route_template(url: str) -> str:
+    """
+    Превращает URL запроса в шаблон маршрута: идентификаторы (числа,
+    UUID, номера телефонов) в пути заменяются на {id}, query-параметры
+    отбрасываются. Например, /accounts/<uuid>/withdraw -> /accounts/{id}/withdraw.
+    """
+    path = httpx.URL(url).path
+    segments = [
+        "{id}" if _ID_SEGMENT.match(segment) else segment
+        for segment in path.split("/")
+    ]
+    return "/".join(segments) or "/"
+
+
+def request_labels(service: str, method: str, url: str) -> Dict[str, str]:
+    return {
+        "service": service,
+        "method": method.upper(),
+        "route": routes.admit(service, route_template(url)),
+    }
+
+
+@contextmanager
+def phase_timer(phase: str) -> Iterator[None]:
+    """
+    Добавляет время выполнения блока к фазе текущего входящего запроса
+    (auth, upstream). Вне запроса ничего не измеряет.
+    Время параллельных вызовов внутри одной фазы суммируется.
+    """
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.phases[phase] = timings.phases.get(phase, 0.0) + time.perf_counter() - started
+
+
+def _mark_endpoint_done() -> None:
+    timings = _timings.get()
+    if timings is not None:
+        timings.endpoint_done = time.perf_counter()
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    # functools.wraps сохраняет сигнатуру: FastAPI строит зависимости по исходной функции
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+    else:
+        @functools.wraps(endpoint)
+        def timed(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_done()
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """
+    Маршрут, отмечающий момент возврата из эндпоинта. Время от него до начала
+    ответа - фаза render: валидация response_model и сериализация в JSON.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+
+def _inbound_route(scope: dict) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """
+    Чистый ASGI-middleware, измеряющий входящие запросы: длительность и
+    размер ответа по шаблону маршрута, число запросов в обработке и
+    время фаз, накопленное через phase_timer и TimedRoute. Вложенные запросы /batch
+    выполняются внутри уже измеряемого запроса и отдельно не учитываются.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _timings.get() is not None:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = "500"
+        size = 0
+
+        timings = _RequestTimings()
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                if timings.endpoint_done is not None:
+                    timings.phases["render"] = time.perf_counter() - timings.endpoint_done
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_flight = http_server_requests_in_flight.labels(method=method)
+        token = _timings.set(timings)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            in_flight.dec()
+            _timings.reset(token)
+
+            route = _inbound_route(scope)
+            http_server_request_duration_seconds.labels(method=method, route=route, status=status).observe(duration)
+            http_server_response_size_bytes.labels(method=method, route=route).observe(size)
+            for phase, seconds in timings.phases.items():
+                http_server_phase_duration_seconds.labels(route=route, phase=phase).observe(seconds)
+
+
+def multiprocess_enabled() -> bool:
+    return bool(settings.prometheus_multiproc_dir)
+
+
+def prepare_multiprocess_dir() -> None:
+    """
+    Очищает каталог метрик от файлов прошлого запуска. Вызывается один раз
+    в главном процессе до старта воркеров.
+    """
+    path = settings.prometheus_multiproc_dir
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def cleanup_dead_workers() -> None:
+    """
+    Удаляет live-gauge файлы воркеров, которые завершились аварийно и не
+    успели убрать их сами. Счётчики и гистограммы умерших воркеров
+    остаются, иначе суммарные значения пошли бы назад.
+    """
+    path = settings.prometheus_multiproc_dir
+    pids = set()
+    for name in os.listdir(path):
+        match = _WORKER_FILE.search(name)
+        if match:
+            pids.add(int(match.group(1)))
+    for pid in pids:
+        if pid != os.getpid() and not _process_alive(pid):
+            multiprocess.mark_process_dead(pid, path)
+
+
+def mark_worker_dead() -> None:
+    multiprocess.mark_process_dead(os.getpid(), settings.prometheus_multiproc_dir)
+
+
+def render_metrics() -> bytes:
+    """
+    Отдаёт метрики текущего процесса, а в multiprocess-режиме - метрики
+    всех воркеров, собранные из общего каталога.
+    """
+    if not multiprocess_enabled():
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=settings.prometheus_multiproc_dir)
+    return generate_latest(registry)
+
+
+routes = RouteRegistry(settings.metrics_max_routes_per_service)
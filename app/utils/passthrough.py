@@ -0,0 +1,35 @@
+import logging
+import random
+
+from fastapi import Response
+from prometheus_client import Counter
+from pydantic import TypeAdapter, ValidationError
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+upstream_contract_violations_total = Counter(
+    "upstream_contract_violations_total",
+    "Sampled passthrough responses that did not match the response schema",
+    ["route"]
+)
+
+
+def passthrough_enabled(route: str) -> bool:
+    return route in settings.passthrough_routes
+
+
+def passthrough_response(route: str, content: bytes, adapter: TypeAdapter) -> Response:
+    """
+    Отдаёт байты downstream-сервиса клиенту как есть, без построения моделей.
+    Доля ответов всё же проверяется по схеме, чтобы заметить расхождение контракта.
+    """
+    if random.random() < settings.passthrough_validation_sample_rate:
+        try:
+            adapter.validate_json(content)
+        except ValidationError as exc:
+            upstream_contract_violations_total.labels(route=route).inc()
+            logger.warning("Upstream response for %s does not match the schema: %s", route, exc)
+    return Response(content=content, media_type="application/json")
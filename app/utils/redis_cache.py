@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.utils import codec
+from app.utils.response_cache import CacheBackend, MemoryCacheBackend
+
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Общий для всех реплик кэш в Redis с небольшим локальным кэшем перед ним.
+    Инвалидация рассылается через pub/sub, чтобы каждая реплика
+    сбросила свою локальную копию.
+    """
+
+    def __init__(self, client: redis.Redis, key_prefix: str, channel: str, local_ttl: float, local_maxsize: int):
+        self._redis = client
+        self._key_prefix = key_prefix
+        self._channel = channel
+        self._local_ttl = local_ttl
+        self._local = MemoryCacheBackend(local_maxsize)
+        self._listener: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCacheBackend":
+        return cls(
+            client=redis.from_url(url),
+            key_prefix=settings.cache_key_prefix,
+            channel=settings.cache_invalidation_channel,
+            local_ttl=settings.cache_local_ttl,
+            local_maxsize=settings.cache_max_size
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self._key_prefix}{key}"
+
+    async def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        ttl = min(self._local_ttl, entry["fresh_until"] - time.time())
+        if ttl > 0:
+            await self._local.set(key, entry, ttl)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self._channel)
+                # Пока подписки не было, инвалидации могли потеряться
+                self._local.clear()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    await self._local.delete(*codec.loads(message["data"]))
+            except (redis.ConnectionError, redis.TimeoutError, OSError) as exc:
+                logger.warning("Cache invalidation subscription lost, resubscribing: %s", exc)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.ensure_future(self._listen())
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            except Exception as exc:
+                logger.warning("Cache invalidation listener failed: %s", exc)
+            self._listener = None
+        await self._redis.aclose()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return (await self.get_many([key]))[0]
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        entries = await self._local.get_many(keys)
+        missing = [index for index, entry in enumerate(entries) if entry is None]
+        if not missing:
+            return entries
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for index in missing:
+                pipe.get(self._key(keys[index]))
+            raw_entries = await pipe.execute()
+
+        for index, raw in zip(missing, raw_entries):
+            if raw is None:
+                continue
+            entry = codec.loads(raw)
+            entries[index] = entry
+            await self._remember(keys[index], entry)
+        return entries
+
+    async def set(self, key: str, entry: Dict[str, Any], ttl: float) -> None:
+        await self._redis.set(self._key(key), codec.dumps(entry), px=max(1, int(ttl * 1000)))
+        await self._remember(key, entry)
+
+    async def delete(self, *keys: str) -> None:
+        await self._local.delete(*keys)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.delete(*[self._key(key) for key in keys])
+            pipe.publish(self._channel, codec.dumps(list(keys)))
+            await pipe.execute()
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.utils import deadline
+from app.utils.single_flight import SingleFlight
+from app.utils.ttl_cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def get_many(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, entry: Dict[str, Any], ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    def __init__(self, maxsize: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=0)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(key)
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        return [self._cache.get(key) for key in keys]
+
+    async def set(self, key: str, entry: Dict[str, Any], ttl: float) -> None:
+        self._cache.set(key, entry, ttl=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.pop(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class ResponseCache:
+    """
+    Кэш ответов downstream-сервисов для справочных данных.
+    Хранит уже декодированный JSON, поэтому подходит для любого бэкенда.
+    После истечения ttl запись ещё cache_stale_seconds отдаётся как есть,
+    а в фоне запускается её обновление (stale-while-revalidate).
+    """
+
+    def __init__(self, backend: CacheBackend, stale_seconds: float):
+        self.backend = backend
+        self.stale_seconds = stale_seconds
+        self._fetches = SingleFlight()
+        self._refreshes: Set[asyncio.Task] = set()
+        # Поколения ключей, которые сейчас загружаются: invalidate увеличивает поколение,
+        # и загрузка, начатая до инвалидации, не записывает устаревшее значение
+        self._generations: Dict[str, int] = {}
+        self._loading: Dict[str, int] = {}
+
+    async def _fetch_and_store(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        generation = self._generations.get(key, 0)
+        self._loading[key] = self._loading.get(key, 0) + 1
+        try:
+            value = await fetch()
+            if self._generations.get(key, 0) != generation:
+                return value
+            entry = {"value": value, "fresh_until": time.time() + ttl}
+            try:
+                await self.backend.set(key, entry, ttl + self.stale_seconds)
+            except Exception as exc:
+                logger.warning("Failed to store cache entry %s: %s", key, exc)
+            return value
+        finally:
+            self._loading[key] -= 1
+            if not self._loading[key]:
+                del self._loading[key]
+                self._generations.pop(key, None)
+
+    async def _shared_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        try:
+            return await self._fetches.do(key, lambda: self._fetch_and_store(key, fetch, ttl))
+        except TimeoutError:
+            raise deadline.DeadlineExceededError("get", f"cache://{key}")
+
+    async def _revalidate(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float) -> None:
+        try:
+            await self._fetches.do(key, lambda: self._fetch_and_store(key, fetch, ttl))
+        except Exception as exc:
+            logger.warning("Failed to revalidate cache entry %s: %s", key, exc)
+
+    def _schedule_revalidation(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float) -> None:
+        # Фоновое обновление получает собственный бюджет, а не остаток запроса, который его запустил
+        task = asyncio.get_running_loop().create_task(
+            self._revalidate(key, fetch, ttl),
+            context=deadline.context_with(time.monotonic() + settings.request_deadline_seconds)
+        )
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    def _use_entry(self, key: str, entry: Dict[str, Any], fetch: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        if entry["fresh_until"] <= time.time():
+            self._schedule_revalidation(key, fetch, ttl)
+        return entry["value"]
+
+    async def _read(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        try:
+            return await self.backend.get_many(keys)
+        except Exception as exc:
+            logger.warning("Cache backend is unavailable, reading from upstream: %s", exc)
+            return [None] * len(keys)
+
+    async def get_or_fetch(self, key: str, fetch: Callable[[], Awaitable[Any]], ttl: float) -> Any:
+        entry = (await self._read([key]))[0]
+        if entry is not None:
+            return self._use_entry(key, entry, fetch, ttl)
+        return await self._shared_fetch(key, fetch, ttl)
+
+    async def get_many_or_fetch(self, keys: List[str], fetch: Callable[[str], Awaitable[Any]], ttl: float) -> List[Any]:
+        """
+        Читает несколько ключей одним запросом к бэкенду и параллельно догружает промахи.
+        fetch получает ключ промаха.
+        """
+        entries = await self._read(keys)
+        values: List[Any] = [None] * len(keys)
+        misses = []
+        for index, (key, entry) in enumerate(zip(keys, entries)):
+            if entry is not None:
+                values[index] = self._use_entry(key, entry, lambda key=key: fetch(key), ttl)
+            else:
+                misses.append(index)
+
+        fetched = await asyncio.gather(*[
+            self._shared_fetch(keys[index], lambda key=keys[index]: fetch(key), ttl)
+            for index in misses
+        ])
+        for index, value in zip(misses, fetched):
+            values[index] = value
+        return values
+
+    async def invalidate(self, *keys: str) -> None:
+        for key in keys:
+            if key in self._loading:
+                self._generations[key] = self._generations.get(key, 0) + 1
+            self._fetches.forget(key)
+        try:
+            await self.backend.delete(*keys)
+        except Exception as exc:
+            logger.warning("Failed to invalidate cache entries %s: %s", keys, exc)
+
+    async def start(self) -> None:
+        await self.backend.start()
+
+    async def close(self) -> None:
+        for task in list(self._refreshes):
+            task.cancel()
+        await self.backend.close()
+
+
+def _create_backend() -> CacheBackend:
+    if settings.cache_backend == "redis":
+        from app.utils.redis_cache import RedisCacheBackend
+        return RedisCacheBackend.from_url(settings.redis_url)
+    return MemoryCacheBackend(settings.cache_max_size)
+
+
+response_cache = ResponseCache(_create_backend(), settings.cache_stale_seconds)
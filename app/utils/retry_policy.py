@@ -0,0 +1,91 @@
+from typing import Dict
+
+import httpx
+from prometheus_client import Counter
+from tenacity import RetryCallState
+from tenacity.retry import retry_base
+
+from app.core.config import settings
+from app.utils.circuit_breaker import CircuitOpenError
+from app.utils.deadline import DeadlineExceededError
+
+
+IDEMPOTENT_METHODS = {"get", "head", "options", "put", "delete"}
+RETRYABLE_STATUSES = {502, 503, 504}
+
+retry_budget_exhausted_total = Counter(
+    "http_retry_budget_exhausted_total",
+    "Retries skipped because the retry budget of the service was exhausted",
+    ["service"]
+)
+
+
+def is_retryable(method: str, exc: BaseException) -> bool:
+    """
+    Повторять можно запросы, которые гарантированно не дошли до сервиса,
+    а также идемпотентные запросы, упавшие по сети или с 502/503/504.
+    """
+    if isinstance(exc, (CircuitOpenError, DeadlineExceededError)):
+        return False
+    if isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    if method.lower() not in IDEMPOTENT_METHODS:
+        return False
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUSES
+    return isinstance(exc, httpx.TransportError)
+
+
+class RetryBudget:
+    """
+    Token bucket повторов одного сервиса: каждый запрос добавляет ratio токена,
+    каждый повтор забирает целый токен. Так повторы не превышают
+    заданную долю от общего трафика.
+    """
+
+    def __init__(self, service: str, ratio: float, max_tokens: float):
+        self.service = service
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+
+    def record_request(self) -> None:
+        self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def try_acquire(self) -> bool:
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        retry_budget_exhausted_total.labels(service=self.service).inc()
+        return False
+
+
+class RetryBudgetRegistry:
+    def __init__(self):
+        self._budgets: Dict[str, RetryBudget] = {}
+
+    def get(self, service: str) -> RetryBudget:
+        budget = self._budgets.get(service)
+        if budget is None:
+            budget = RetryBudget(service, settings.retry_budget_ratio, settings.retry_budget_max_tokens)
+            self._budgets[service] = budget
+        return budget
+
+
+class retry_by_policy(retry_base):
+    def __init__(self, method: str, budget: RetryBudget, max_attempts: int):
+        self.method = method
+        self.budget = budget
+        self.max_attempts = max_attempts
+
+    def __call__(self, retry_state: RetryCallState) -> bool:
+        if retry_state.outcome is None or not retry_state.outcome.failed:
+            return False
+        if retry_state.attempt_number >= self.max_attempts:
+            return False
+        if not is_retryable(self.method, retry_state.outcome.exception()):
+            return False
+        return self.budget.try_acquire()
+
+
+retry_budgets = RetryBudgetRegistry()
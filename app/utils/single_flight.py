@@ -0,0 +1,45 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from app.utils import deadline
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные одинаковые вызовы: пока первый вызов с данным ключом
+    не завершился, остальные ждут его результат вместо собственного запроса.
+    Общий вызов выполняется с самым поздним крайним сроком из сроков ожидающих,
+    а каждый ожидающий ждёт не дольше своего оставшегося бюджета и получает TimeoutError.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Tuple[asyncio.Future, deadline.SharedDeadline]] = {}
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        call = self._calls.get(key)
+        if call is not None and call[0] is future:
+            del self._calls[key]
+        if not future.cancelled():
+            future.exception()
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            shared = deadline.SharedDeadline(deadline.current())
+            future = asyncio.get_running_loop().create_task(func(), context=deadline.context_with(shared))
+            self._calls[key] = (future, shared)
+            future.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            future, shared = call
+            shared.join(deadline.current())
+        return await asyncio.wait_for(asyncio.shield(future), timeout=deadline.remaining())
+
+    def forget(self, key: Hashable) -> None:
+        """
+        Следующий вызов с этим ключом начнёт новый вызов, даже если текущий ещё не завершился.
+        Уже ожидающие получат результат текущего.
+        """
+        self._calls.pop(key, None)
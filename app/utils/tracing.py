@@ -0,0 +1,277 @@
+import logging
+import os
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from app.core.config import settings
+from app.utils import codec
+
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class SpanContext:
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+class Span:
+    """
+    Один участок трассы в терминах OpenTelemetry: имя, родитель, время
+    начала и конца в наносекундах, атрибуты и статус.
+    """
+
+    def __init__(self, name: str, context: SpanContext, parent_id: Optional[str], kind: str,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "ok"
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "error"
+        self.attributes["exception.type"] = type(exc).__name__
+        self.attributes["exception.message"] = str(exc)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "service": settings.tracing_service_name,
+            "name": self.name,
+            "kind": self.kind,
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """
+    Заглушка, которую start_span отдаёт при выключенной трассировке,
+    чтобы вызывающему коду не нужно было проверять span на None.
+    """
+
+    name = ""
+    status = "ok"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class LogSpanExporter(SpanExporter):
+    def export(self, span: Span) -> None:
+        logger.info("span %s", codec.dumps(span.to_dict()).decode())
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Пишет завершённые спаны в файл по одному JSON-объекту на строку.
+    Удобен для тестов и локальной отладки.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = codec.dumps(span.to_dict()) + b"\n"
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.path, "ab")
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    if not value:
+        return None
+    match = _TRACEPARENT.match(value.strip().lower())
+    if match is None:
+        return None
+    trace_id, span_id, flags = match.groups()
+    if trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return SpanContext(trace_id, span_id, bool(int(flags, 16) & 1))
+
+
+class Tracer:
+    """
+    Создаёт спаны, связывает их через contextvar и передаёт завершённые
+    выбранные (sampled) спаны экспортёру. Решение о выборке принимается
+    в корне трассы и наследуется всеми её спанами, в том числе в других
+    сервисах через заголовок traceparent.
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter], sample_rate: float):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def set_exporter(self, exporter: Optional[SpanExporter]) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+        self.exporter = exporter
+
+    def _export(self, span: Span) -> None:
+        try:
+            self.exporter.export(span)
+        except Exception as exc:
+            logger.warning("Failed to export span %s: %s", span.name, exc)
+
+    @contextmanager
+    def start_span(self, name: str, kind: str = "internal", attributes: Optional[Dict[str, Any]] = None,
+                   parent: Optional[SpanContext] = None) -> Iterator[Span]:
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        if parent is None:
+            current = _current_span.get()
+            parent = current.context if current is not None else None
+        if parent is None:
+            context = SpanContext(os.urandom(16).hex(), os.urandom(8).hex(), random.random() < self.sample_rate)
+        else:
+            context = SpanContext(parent.trace_id, os.urandom(8).hex(), parent.sampled)
+
+        span = Span(name, context, parent.span_id if parent is not None else None, kind, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            if context.sampled:
+                self._export(span)
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+
+
+def propagation_headers() -> Dict[str, str]:
+    """
+    Заголовок traceparent текущего спана для исходящего HTTP-запроса или AMQP-сообщения.
+    """
+    span = _current_span.get()
+    if span is None:
+        return {}
+    return {TRACEPARENT_HEADER: span.context.traceparent()}
+
+
+class TracingMiddleware:
+    """
+    Чистый ASGI-middleware, открывающий серверный спан на каждый входящий
+    запрос. Продолжает трассу из заголовка traceparent, если он пришёл.
+    Вложенные запросы /batch становятся дочерними спанами запроса пакета.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        parent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                parent = parse_traceparent(value.decode("latin-1"))
+                break
+
+        method = scope["method"]
+        attributes = {"http.method": method, "http.target": scope["path"]}
+        kind = "server"
+        if _current_span.get() is not None:
+            parent = None
+            kind = "internal"
+            attributes["http.batch_sub_request"] = True
+        with tracer.start_span(f"{method} {scope['path']}", kind=kind, attributes=attributes,
+                               parent=parent) as span:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.status = "error"
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route is not None:
+                    span.name = f"{method} {route}"
+                    span.set_attribute("http.route", route)
+
+
+def _create_exporter() -> Optional[SpanExporter]:
+    if settings.tracing_exporter == "file":
+        return FileSpanExporter(settings.tracing_file_path)
+    if settings.tracing_exporter == "log":
+        return LogSpanExporter()
+    return None
+
+
+tracer = Tracer(_create_exporter(), settings.tracing_sample_rate)
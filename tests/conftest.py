@@ -0,0 +1,18 @@
+import os
+
+
+# Settings читает обязательные переменные при импорте app.core.config
+for name, value in {
+    "USER_SERVICE_URL": "http://user",
+    "ACCOUNT_SERVICE_URL": "http://account",
+    "CREDIT_SERVICE_URL": "http://credit",
+    "EXCHANGE_SERVICE_URL": "http://exchange",
+    "RABBITMQ_ACCOUNT_HOST": "localhost",
+    "RABBITMQ_ACCOUNT_PORT": "5672",
+    "RABBITMQ_ACCOUNT_LOGIN": "guest",
+    "RABBITMQ_ACCOUNT_PASSWORD": "guest",
+    "TRANSFER_QUEUE": "transfers",
+    "RETRIES": "3",
+    "WAIT_SECONDS": "1",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+import pytest
+
+from app.utils.json_stream import iter_json_array
+
+
+SAMPLE = (
+    '[ {"id": "3fa85f64-5717-4562-b3fc-2c963f66afa6", "amount": 1500.75, "note": "перевод \\"к\\" ]"},'
+    ' 1500.75, -2e-3, 42, true, false, null, "строка", [1, [2, {"a": []}]], {} ]'
+)
+
+
+def _collect(chunks):
+    async def gen():
+        for chunk in chunks:
+            yield chunk
+
+    async def run():
+        return [item async for item in iter_json_array(gen())]
+
+    return asyncio.run(run())
+
+
+def test_whole_body():
+    assert _collect([SAMPLE.encode()]) == json.loads(SAMPLE)
+
+
+def test_split_at_every_byte_offset():
+    body = SAMPLE.encode()
+    expected = json.loads(SAMPLE)
+    for offset in range(1, len(body)):
+        assert _collect([body[:offset], body[offset:]]) == expected, offset
+
+
+def test_one_byte_chunks():
+    body = SAMPLE.encode()
+    assert _collect([body[i:i + 1] for i in range(len(body))]) == json.loads(SAMPLE)
+
+
+def test_number_split_across_chunks():
+    assert _collect([b"[1500.", b"75]"]) == [1500.75]
+
+
+def test_empty_array():
+    assert _collect([b" [", b" ] "]) == []
+
+
+def test_truncated_array():
+    with pytest.raises(ValueError):
+        _collect([b"[1, 2"])
+
+
+def test_not_an_array():
+    with pytest.raises(ValueError):
+        _collect([b'{"a": 1}'])
@@ -0,0 +1,137 @@
+import asyncio
+import time
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+
+import redis.asyncio as redis
+
+from app.utils.redis_cache import RedisCacheBackend
+
+
+CHANNEL = "test:invalidation"
+
+
+def _backend(server):
+    return RedisCacheBackend(
+        client=fakeredis.FakeAsyncRedis(server=server),
+        key_prefix="test:",
+        channel=CHANNEL,
+        local_ttl=60,
+        local_maxsize=100
+    )
+
+
+def _entry(value):
+    return {"value": value, "fresh_until": time.time() + 60}
+
+
+async def _wait_for(condition, timeout=5.0):
+    started = time.monotonic()
+    while not await condition():
+        assert time.monotonic() - started < timeout, "condition was not met in time"
+        await asyncio.sleep(0.01)
+
+
+async def _subscribed(backend, count=1):
+    async def check():
+        return dict(await backend._redis.pubsub_numsub(CHANNEL)).get(CHANNEL.encode(), 0) >= count
+
+    await _wait_for(check)
+
+
+def test_get_many_reads_only_local_misses_from_redis():
+    async def run():
+        server = fakeredis.FakeServer()
+        first, second = _backend(server), _backend(server)
+        await first.set("local", _entry(1), 60)
+        await second.set("remote", _entry(2), 60)
+        # Локальная копия должна отдаваться без обращения к Redis
+        await first._redis.delete("test:local")
+
+        requested = []
+        pipeline = first._redis.pipeline
+
+        def spy(*args, **kwargs):
+            pipe = pipeline(*args, **kwargs)
+            get = pipe.get
+
+            def recording_get(name):
+                requested.append(name)
+                return get(name)
+
+            pipe.get = recording_get
+            return pipe
+
+        first._redis.pipeline = spy
+        entries = await first.get_many(["local", "remote", "absent"])
+
+        assert [entry and entry["value"] for entry in entries] == [1, 2, None]
+        assert requested == ["test:remote", "test:absent"]
+        assert (await first._local.get("remote"))["value"] == 2
+        await first.close()
+        await second.close()
+
+    asyncio.run(run())
+
+
+def test_delete_drops_local_copy_on_other_backend():
+    async def run():
+        server = fakeredis.FakeServer()
+        first, second = _backend(server), _backend(server)
+        await first.start()
+        await second.start()
+        await _subscribed(first, count=2)
+
+        await first.set("key", _entry(1), 60)
+        assert (await second.get("key"))["value"] == 1
+        assert await second._local.get("key") is not None
+
+        await first.delete("key")
+
+        async def dropped():
+            return await second._local.get("key") is None
+
+        await _wait_for(dropped)
+        assert await second.get("key") is None
+        await first.close()
+        await second.close()
+
+    asyncio.run(run())
+
+
+def test_listener_resubscribes_after_connection_error():
+    async def run():
+        server = fakeredis.FakeServer()
+        first, second = _backend(server), _backend(server)
+        pubsub = second._redis.pubsub
+        attempts = []
+
+        def failing_pubsub(**kwargs):
+            client = pubsub(**kwargs)
+            attempts.append(client)
+            if len(attempts) == 1:
+                async def subscribe(*channels):
+                    raise redis.ConnectionError("connection reset")
+
+                client.subscribe = subscribe
+            return client
+
+        second._redis.pubsub = failing_pubsub
+        await second.start()
+        await _subscribed(first)
+        assert len(attempts) == 2
+
+        await first.set("key", _entry(1), 60)
+        await second.get("key")
+        await first.delete("key")
+
+        async def dropped():
+            return await second._local.get("key") is None
+
+        await _wait_for(dropped)
+        await first.close()
+        await second.close()
+
+    asyncio.run(run())